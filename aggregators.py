@@ -0,0 +1,205 @@
+"""
+Single-pass aggregators over analyzed reviews.
+Each aggregator sees one review at a time through add(), so a stream of
+analyzed reviews can feed counts, display groups, top-N lists and
+statistics together without ever being held in memory as a whole.
+"""
+
+import heapq
+from itertools import count
+
+
+def consume(reviews, *aggregators):
+    """Feed every review to every aggregator in one pass; returns the aggregators"""
+    for review in reviews:
+        for aggregator in aggregators:
+            aggregator.add(review)
+    return aggregators
+
+
+class SentimentCounts:
+    """Reviews per sentiment label, in the same key order as get_sentiment_counts"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, review):
+        sentiment = review.get('sentiment', 'Neutral')
+        self.counts[sentiment] = self.counts.get(sentiment, 0) + 1
+
+    def result(self):
+        counts = dict(self.counts)
+        # Ensure all three categories are present
+        for sentiment in ['Positive', 'Negative', 'Neutral']:
+            counts.setdefault(sentiment, 0)
+        return counts
+
+
+class SentimentGroups:
+    """The first max_per_group reviews of each sentiment, for display"""
+
+    def __init__(self, max_per_group=5):
+        self.max_per_group = max_per_group
+        self.grouped = {'Positive': [], 'Negative': [], 'Neutral': []}
+
+    def add(self, review):
+        group = self.grouped[review.get('sentiment', 'Neutral')]
+        if len(group) < self.max_per_group:
+            group.append(review)
+
+    def result(self):
+        return self.grouped
+
+
+class FirstReviews:
+    """The first n reviews in stream order"""
+
+    def __init__(self, n=20):
+        self.n = n
+        self.reviews = []
+
+    def add(self, review):
+        if len(self.reviews) < self.n:
+            self.reviews.append(review)
+
+    def result(self):
+        return self.reviews
+
+
+class TopReviews:
+    """The top_n highest and lowest polarity reviews, kept in two bounded heaps"""
+
+    def __init__(self, top_n=3):
+        self.top_n = top_n
+        self._positive = []  # min-heap of the highest polarities
+        self._negative = []  # min-heap of negated polarities, i.e. the lowest
+        self._order = count()
+
+    def add(self, review):
+        if self.top_n <= 0:
+            return
+        polarity = review['polarity']
+        index = next(self._order)
+        # Ties keep sorted()'s order: later reviews rank higher among the positives,
+        # earlier reviews rank higher among the negatives
+        self._push(self._positive, (polarity, index, review))
+        self._push(self._negative, (-polarity, -index, review))
+
+    def _push(self, heap, item):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+
+    def result(self):
+        return {
+            'top_positive': [item[2] for item in sorted(self._positive, key=lambda item: item[:2], reverse=True)],
+            'top_negative': [item[2] for item in sorted(self._negative, key=lambda item: item[:2], reverse=True)]
+        }
+
+
+class SentimentStats:
+    """
+    Mergeable running totals for get_sentiment_statistics.
+    Keeps count, sums, sums of squares, per-label counts and a histogram of
+    the 3-decimal scores, so partial results from chunks, workers or products
+    can be merged and still give exact variance and percentiles.
+    """
+
+    # Scores are rounded to 3 places, so one bin per 0.001 is exact
+    RESOLUTION = 1000
+    POLARITY_BINS = 2 * RESOLUTION + 1  # -1.000 .. 1.000
+    SUBJECTIVITY_BINS = RESOLUTION + 1  # 0.000 .. 1.000
+
+    def __init__(self):
+        self.count = 0
+        self.total_polarity = 0
+        self.total_subjectivity = 0
+        self.sq_polarity = 0
+        self.sq_subjectivity = 0
+        self.counts = SentimentCounts()
+        self.polarity_histogram = [0] * self.POLARITY_BINS
+        self.subjectivity_histogram = [0] * self.SUBJECTIVITY_BINS
+
+    def add(self, review):
+        polarity = review['polarity']
+        subjectivity = review['subjectivity']
+        self.count += 1
+        self.total_polarity += polarity
+        self.total_subjectivity += subjectivity
+        self.sq_polarity += polarity * polarity
+        self.sq_subjectivity += subjectivity * subjectivity
+        self.counts.add(review)
+        self.polarity_histogram[round(polarity * self.RESOLUTION) + self.RESOLUTION] += 1
+        self.subjectivity_histogram[round(subjectivity * self.RESOLUTION)] += 1
+
+    def merge(self, other):
+        """Fold another accumulator into this one; returns self"""
+        self.count += other.count
+        self.total_polarity += other.total_polarity
+        self.total_subjectivity += other.total_subjectivity
+        self.sq_polarity += other.sq_polarity
+        self.sq_subjectivity += other.sq_subjectivity
+        for sentiment, n in other.counts.counts.items():
+            self.counts.counts[sentiment] = self.counts.counts.get(sentiment, 0) + n
+        self.polarity_histogram = [a + b for a, b in zip(self.polarity_histogram, other.polarity_histogram)]
+        self.subjectivity_histogram = [a + b for a, b in zip(self.subjectivity_histogram, other.subjectivity_histogram)]
+        return self
+
+    def variance(self):
+        """
+        Population variance of polarity and subjectivity
+        Returns: dict with polarity and subjectivity variance
+        """
+        if not self.count:
+            return {'polarity': 0.0, 'subjectivity': 0.0}
+        return {
+            'polarity': max(0.0, self.sq_polarity / self.count - (self.total_polarity / self.count) ** 2),
+            'subjectivity': max(0.0, self.sq_subjectivity / self.count - (self.total_subjectivity / self.count) ** 2)
+        }
+
+    def percentiles(self, percents=(25, 50, 75, 90)):
+        """
+        Nearest-rank percentiles of polarity and subjectivity
+        Returns: dict with polarity and subjectivity, each mapping percent -> score
+        """
+        return {
+            'polarity': self._percentiles(self.polarity_histogram, -self.RESOLUTION, percents),
+            'subjectivity': self._percentiles(self.subjectivity_histogram, 0, percents)
+        }
+
+    def _percentiles(self, histogram, offset, percents):
+        result = {}
+        for percent in percents:
+            if not self.count:
+                result[percent] = 0.0
+                continue
+            rank = max(1, -(-percent * self.count // 100))  # ceil without floats
+            seen = 0
+            for bin_index, n in enumerate(histogram):
+                seen += n
+                if seen >= rank:
+                    result[percent] = round((bin_index + offset) / self.RESOLUTION, 3)
+                    break
+        return result
+
+    def result(self):
+        if not self.count:
+            return {
+                'total_reviews': 0,
+                'avg_polarity': 0.0,
+                'avg_subjectivity': 0.0,
+                'sentiment_distribution': {'Positive': 0, 'Negative': 0, 'Neutral': 0},
+                'sentiment_percentages': {'Positive': 0.0, 'Negative': 0.0, 'Neutral': 0.0}
+            }
+
+        sentiment_counts = self.counts.result()
+        return {
+            'total_reviews': self.count,
+            'avg_polarity': round(self.total_polarity / self.count, 3),
+            'avg_subjectivity': round(self.total_subjectivity / self.count, 3),
+            'sentiment_distribution': sentiment_counts,
+            'sentiment_percentages': {
+                sentiment: round((n / self.count) * 100, 1) for sentiment, n in sentiment_counts.items()
+            }
+        }
@@ -1,8 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
-import time
 import random
 import logging
+from html_parsing import make_soup
+from http_session import fetch
+from rate_limiter import get_rate_limiter
+from metrics import CAPTCHA_DETECTIONS
+from retailers import is_bot_check
 from urllib.parse import urlparse
 
 class AmazonReviewScraper:
@@ -22,15 +24,16 @@ class AmazonReviewScraper:
         headers = self.get_random_header()
         
         try:
-            time.sleep(random.uniform(2, 5))
-            response = requests.get(url, headers=headers)
+            response = fetch(url, headers=headers)
             response.raise_for_status()
 
-            if "captcha" in response.text.lower():
+            if is_bot_check(response.text, 'amazon'):
                 self.logger.error("Amazon CAPTCHA detected.")
+                get_rate_limiter().penalize(url)
+                CAPTCHA_DETECTIONS.inc(retailer='amazon')
                 return []
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content, 'amazon')
             review_elements = soup.find_all('div', {'data-hook': 'review'})
 
             for element in review_elements:
@@ -1,83 +1,345 @@
-from flask import Flask, render_template, request, flash
+from flask import Flask, render_template, request, flash, jsonify, redirect, url_for, send_file, abort, stream_with_context
 import os
-import io
+import re
+import uuid
 import base64
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import threading
 from sentiment import SentimentAnalyzer
 
 # Import only the new, unified smart scraper
-from smart_scraper import SmartScraper
+from smart_scraper import SmartScraper, ScrapeError
+from retailers import REVIEWS_PER_PAGE
+from driver_resolver import ensure_chromedriver
+from jobs import JobQueue, QueueFull, Job
+from batch import BatchRunner
+from review_store import ReviewStore, update_product
+from exports import EXPORT_FORMATS, export_reviews, parquet_available, sentiment_label
+from charts import render_chart, CHART_FORMATS, CHART_FORMAT
+from results_table import SENTIMENT_LABELS
+import metrics
+from profiling import get_profiler
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 
-analyzer = SentimentAnalyzer()
-# A single instance of our powerful scraper
-scraper = SmartScraper()
+# Fail at boot rather than on the first request if chromedriver is missing
+ensure_chromedriver()
+
+# Reviews to collect per product, across as many review pages as needed
+MAX_REVIEWS = int(os.environ.get('MAX_REVIEWS', 100))
+BATCH_OUTPUT_DIR = os.environ.get('BATCH_OUTPUT_DIR', 'batch_results')
+BATCH_MAX_URLS = int(os.environ.get('BATCH_MAX_URLS', 500))
+
+# Shared services are created on first use, in the worker process that uses them,
+# so importing the app stays fast and no threads or connections cross a fork
+_services = {}
+_services_lock = threading.RLock()
+
+def lazy_service(name, factory):
+    """Create a shared service on first use; returns the instance"""
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = factory()
+    return service
+
+def get_analyzer():
+    return lazy_service('analyzer', SentimentAnalyzer)
+
+def get_scraper():
+    # A single instance of our powerful scraper
+    return lazy_service('scraper', SmartScraper)
+
+def get_job_queue():
+    # Scrapes run on worker threads so web workers are never blocked on Selenium
+    return lazy_service('job_queue', JobQueue)
+
+def get_batch_runner():
+    # Multi-product runs share the scraper and analyzer; results land in JSONL files
+    return lazy_service('batch_runner', lambda: BatchRunner(scraper=get_scraper(), analyzer=get_analyzer()))
+
+def get_review_store():
+    # None when REVIEW_STORE_DB is empty; analyses then keep nothing between runs
+    return lazy_service('review_store', ReviewStore.from_env)
+
+def preload():
+    """
+    Import the heavy dependencies up front. Meant for the gunicorn master with
+    --preload (APP_PRELOAD=1), so forked workers share these pages copy-on-write.
+    Starts no threads, browsers or database connections, since those do not
+    survive a fork.
+    """
+    from lexicon_sentiment import LexiconScorer
+    LexiconScorer.from_textblob()  # Loads the sentiment lexicon
+    import selenium.webdriver
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions
+    from matplotlib.figure import Figure
+    from matplotlib.backends import backend_agg
+
+if os.environ.get('APP_PRELOAD') == '1':
+    preload()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def wants_json():
+    return request.accept_mimetypes.best == 'application/json'
+
+def profile_requested():
+    return request.headers.get('X-Profile') == '1' or request.values.get('profile') == '1'
+
+def request_id():
+    supplied = request.headers.get('X-Request-Id', '')
+    return supplied if re.fullmatch(r'[\w.-]{1,64}', supplied) else uuid.uuid4().hex
+
 @app.route('/analyze', methods=['POST'])
 def analyze_reviews():
+    product_url = request.form.get('product_url', '').strip()
+    scraper_choice = request.form.get('scraper_choice') # We still get the choice to log it
+
+    if not product_url or not scraper_choice:
+        if wants_json():
+            return jsonify(error='Please select a retailer and enter a valid URL'), 400
+        flash('Please select a retailer and enter a valid URL', 'error')
+        return render_template('index.html')
+
+    task, profile_id = run_analysis, None
+    if get_profiler().should_profile(profile_requested()):
+        profile_id = request_id()
+        task = get_profiler().wrap(run_analysis, profile_id, label=f'analyze {product_url}')
+
     try:
-        product_url = request.form.get('product_url', '').strip()
-        scraper_choice = request.form.get('scraper_choice') # We still get the choice to log it
-
-        if not product_url or not scraper_choice:
-            flash('Please select a retailer and enter a valid URL', 'error')
-            return render_template('index.html')
-
-        # --- THIS IS THE CORRECTED LOGIC ---
-        # The old validation check is removed. We now directly call the scraper.
-        
-        flash(f'Using Smart Scraper for {scraper_choice.capitalize()}... Please wait.', 'info')
-        reviews = scraper.get_reviews(product_url)
-        
-        if not reviews:
-            flash('No reviews were found. The site may be blocking requests or the page structure has changed.', 'warning')
-            return render_template('index.html')
-        
-        analyzed_reviews = analyzer.analyze_reviews(reviews)
-        chart_data = analyzer.get_sentiment_counts(analyzed_reviews)
-        chart_base64 = create_sentiment_chart(chart_data)
-        grouped_reviews = analyzer.group_reviews_by_sentiment(analyzed_reviews)
-        
-        return render_template('results.html', 
-                             reviews=analyzed_reviews[:20],
-                             chart=chart_base64,
-                             sentiment_counts=chart_data,
-                             grouped_reviews=grouped_reviews,
-                             total_reviews=len(analyzed_reviews))
-        
-    except Exception as e:
-        app.logger.error(f"Error in analyze_reviews: {str(e)}")
+        job = get_job_queue().submit(task, product_url)
+    except QueueFull:
+        if wants_json():
+            return jsonify(error='The server is busy. Please try again shortly.'), 503, {'Retry-After': '30'}
+        flash('The server is busy. Please try again shortly.', 'warning')
+        return render_template('index.html'), 503
+
+    app.logger.info(f"Queued {scraper_choice} analysis for {product_url} as job {job.id}")
+    if profile_id:
+        app.logger.info(f"Profiling job {job.id} as {profile_id}")
+    if wants_json():
+        return jsonify(job_id=job.id,
+                       profile_id=profile_id,
+                       status_url=url_for('job_status', job_id=job.id),
+                       results_url=url_for('job_results', job_id=job.id)), 202
+    return redirect(url_for('job_results', job_id=job.id))
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job'), 404
+    status = job.to_dict()
+    status['queue_depth'] = get_job_queue().depth()
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/results')
+def job_results(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        flash('That analysis has expired or does not exist.', 'error')
+        return redirect(url_for('index'))
+
+    if job.status in (Job.PENDING, Job.RUNNING):
+        return render_template('job_status.html', job=job,
+                               status_url=url_for('job_status', job_id=job.id),
+                               results_url=url_for('job_results', job_id=job.id))
+
+    if job.status == Job.FAILED:
         flash(f'An unexpected error occurred.', 'error')
         return render_template('index.html')
 
+    if job.result and 'batch_id' in job.result:
+        # A batch has no results page; its products are lines of the batch's JSONL file
+        return jsonify(dict(job.to_dict(), batch_id=job.result['batch_id'], summary=job.result['summary'],
+                            results_url=url_for('batch_results', batch_id=job.result['batch_id'])))
+
+    if not job.result:
+        flash('No reviews were found. The site may be blocking requests or the page structure has changed.', 'warning')
+        return render_template('index.html')
+
+    # Stored products can be downloaded in full, straight from the review store
+    export_urls = {}
+    if job.result.get('product_url'):
+        export_urls = {fmt: url_for('export_product_reviews', fmt=fmt, url=job.result['product_url'])
+                       for fmt in EXPORT_FORMATS if fmt != 'parquet' or parquet_available()}
+
+    # The chart is fetched separately by the browser and cached by its counts
+    return render_template('results.html', **job.result, export_urls=export_urls,
+                           chart_url=url_for('sentiment_chart', fmt=CHART_FORMAT, **job.result['sentiment_counts']))
+
+@app.route('/charts/sentiment.<fmt>')
+def sentiment_chart(fmt):
+    if fmt not in CHART_FORMATS:
+        abort(404)
+    # Query order is the bar order, e.g. ?Positive=12&Negative=3&Neutral=5
+    sentiment_counts = {}
+    for label, value in request.args.items():
+        # Nine digits covers any real count and keeps int() and the chart cache bounded
+        if label not in SENTIMENT_LABELS or not value.isdecimal() or len(value) > 9:
+            abort(400)
+        sentiment_counts[label] = int(value)
+    if not sentiment_counts:
+        abort(400)
+
+    try:
+        image = render_chart(sentiment_counts, fmt)
+    except Exception as e:
+        app.logger.error(f"Error creating chart: {str(e)}")
+        abort(500)
+
+    response = app.response_class(image, mimetype=CHART_FORMATS[fmt])
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
+
+@app.route('/exports/reviews.<fmt>')
+def export_product_reviews(fmt):
+    # e.g. /exports/reviews.jsonl?url=<product url>&sentiment=Negative&max_rating=2
+    store = get_review_store()
+    if store is None or fmt not in EXPORT_FORMATS:
+        abort(404)
+    if fmt == 'parquet' and not parquet_available():
+        return jsonify(error='Parquet export needs pyarrow installed on the server'), 501
+
+    product = store.get_product(request.args.get('url', ''))
+    if product is None:
+        return jsonify(error='No stored reviews for that product; analyze it first'), 404
+
+    sentiment = request.args.get('sentiment')
+    if sentiment:
+        sentiment = sentiment_label(sentiment)
+        if sentiment is None:
+            return jsonify(error=f"sentiment must be one of {', '.join(SENTIMENT_LABELS)}"), 400
+    bounds = {}
+    for name in ('min_rating', 'max_rating'):
+        value = request.args.get(name)
+        if value is not None:
+            # Ratings are small; the length cap also keeps int() away from huge inputs
+            if not value.isdecimal() or len(value) > 3:
+                return jsonify(error=f'{name} must be a whole number from 0 to 999'), 400
+            bounds[name] = int(value)
+
+    chunks = export_reviews(store.iter_reviews(product['id'], sentiment=sentiment), fmt, **bounds)
+    response = app.response_class(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=reviews-{product["id"]}.{fmt}'
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.ENABLED:
+        abort(404)
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/batch', methods=['POST'])
+def start_batch():
+    payload = request.get_json(silent=True)
+    urls = payload.get('urls') if isinstance(payload, dict) else None
+    urls = [url.strip() for url in urls if isinstance(url, str) and url.strip()] if isinstance(urls, list) else []
+    if not urls:
+        return jsonify(error='Send a JSON body with a non-empty "urls" list'), 400
+    if len(urls) > BATCH_MAX_URLS:
+        return jsonify(error=f'A batch may contain at most {BATCH_MAX_URLS} URLs'), 400
+
+    os.makedirs(BATCH_OUTPUT_DIR, exist_ok=True)
+    batch_id = uuid.uuid4().hex
+    try:
+        job = get_job_queue().submit(run_batch, urls, batch_id, profile=profile_requested())
+    except QueueFull:
+        return jsonify(error='The server is busy. Please try again shortly.'), 503, {'Retry-After': '30'}
+
+    return jsonify(batch_id=batch_id,
+                   job_id=job.id,
+                   status_url=url_for('job_status', job_id=job.id),
+                   results_url=url_for('batch_results', batch_id=batch_id)), 202
+
+@app.route('/batch/<batch_id>.jsonl')
+def batch_results(batch_id):
+    # Results are readable while the batch runs; each line is one finished product
+    if not re.fullmatch(r'[0-9a-f]{32}', batch_id) or not os.path.exists(batch_output_path(batch_id)):
+        abort(404)
+    return send_file(os.path.abspath(batch_output_path(batch_id)), mimetype='application/x-ndjson')
+
+def batch_output_path(batch_id):
+    return os.path.join(BATCH_OUTPUT_DIR, f'{batch_id}.jsonl')
+
+def run_batch(urls, batch_id, profile=False):
+    """
+    Analyze a batch of products into the batch's JSONL file; runs on a job worker thread
+    Returns: dict with the batch id and the run's product count per status
+    """
+    summary = get_batch_runner().run(urls, batch_output_path(batch_id), profile=profile)
+    return {'batch_id': batch_id, 'summary': summary}
+
+def run_analysis(product_url):
+    """
+    Scrape and analyze one product; runs on a job worker thread
+    Returns: template context for results.html, or None if no reviews were found
+    """
+    store = get_review_store()
+    if store is not None:
+        return run_stored_analysis(store, product_url)
+
+    with metrics.STAGE_SECONDS.time(stage='analysis_job'):
+        # Each page of reviews is scored as it arrives, while later pages load, straight
+        # into compact columns rather than a list of per-review dicts
+        reviews = get_scraper().stream_reviews(product_url, max_reviews=MAX_REVIEWS)
+        try:
+            table = get_analyzer().analyze_reviews_table(reviews, chunk_size=REVIEWS_PER_PAGE)
+        except ScrapeError as e:
+            app.logger.warning(f"Could not read reviews for {product_url}: {e}")
+            return None
+    if not len(table):
+        return None
+
+    return {
+        'reviews': table.to_dicts(limit=20),
+        'sentiment_counts': table.sentiment_counts(),
+        'grouped_reviews': table.group_by_sentiment(),
+        'total_reviews': len(table)
+    }
+
+def run_stored_analysis(store, product_url):
+    """
+    Bring the product's stored reviews up to date, scraping and analyzing only
+    reviews the store has not seen, and build the results from the store
+    Returns: template context for results.html, or None if no reviews are stored
+    """
+    with metrics.STAGE_SECONDS.time(stage='analysis_job'):
+        try:
+            product, _ = update_product(store, get_scraper(), get_analyzer(), product_url, max_reviews=MAX_REVIEWS)
+        except ScrapeError as e:
+            # The retailer cannot be read right now; show what the store already has
+            app.logger.warning(f"Could not read reviews for {product_url}: {e}")
+            product = store.get_product(product_url)
+            if product is None:
+                return None
+        chart_data = store.sentiment_counts(product['id'])
+        total_reviews = sum(chart_data.values())
+        if not total_reviews:
+            return None
+
+        return {
+            'product_url': product['canonical_url'],
+            'reviews': list(store.iter_reviews(product['id'], limit=20)),
+            'sentiment_counts': chart_data,
+            'grouped_reviews': store.group_reviews_by_sentiment(product['id']),
+            'total_reviews': total_reviews
+        }
+
 def create_sentiment_chart(sentiment_counts):
+    """
+    Base64-encoded PNG chart for callers that still inline it
+    Returns: base64 string, or None if the chart could not be drawn
+    """
     try:
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sentiments = list(sentiment_counts.keys())
-        counts = list(sentiment_counts.values())
-        colors = ['#2ecc71', '#e74c3c', '#95a5a6']
-        bars = ax.bar(sentiments, counts, color=colors[:len(sentiments)])
-        ax.set_title('Product Review Sentiment Distribution', fontsize=16, fontweight='bold')
-        ax.set_xlabel('Sentiment', fontsize=12)
-        ax.set_ylabel('Number of Reviews', fontsize=12)
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height, f'{int(height)}', ha='center', va='bottom', fontweight='bold')
-        plt.tight_layout()
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-        plt.close(fig)
-        return img_base64
+        return base64.b64encode(render_chart(sentiment_counts, 'png')).decode('utf-8')
     except Exception as e:
         app.logger.error(f"Error creating chart: {str(e)}")
         return None
@@ -0,0 +1,196 @@
+"""
+Batch analysis of many products.
+Scrapes product URLs concurrently with a bounded number of scrapes per
+retailer, runs each product's reviews through the batched sentiment pass and
+appends one JSON line per product as soon as it finishes. Re-running with
+the same output file skips products that already completed, so a crashed
+run resumes where it stopped.
+
+    python batch.py urls.txt -o results.jsonl [--workers 4] [--per-retailer 2]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import uuid
+import threading
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from retailers import detect_retailer, canonicalize_url, REVIEWS_PER_PAGE
+from profiling import get_profiler
+
+
+def read_urls(source):
+    """Read URLs from a file (or '-' for stdin), one per line, skipping blanks and # comments"""
+    f = sys.stdin if source == '-' else open(source)
+    try:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def load_completed(output_path):
+    """
+    Canonical URLs already finished in an earlier run of the same output file
+    Returns: set of canonical URLs
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue # A line cut short by a crash is simply redone
+            # Errors (blocked or failed scrapes) are retried; no_reviews means the page really had none
+            if record.get('status') in ('ok', 'no_reviews'):
+                completed.add(record['canonical_url'])
+    return completed
+
+
+class BatchRunner:
+    def __init__(self, scraper=None, analyzer=None, workers=None, per_retailer=None, max_reviews=None, include_reviews=True):
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        if scraper is None:
+            from smart_scraper import SmartScraper
+            scraper = SmartScraper()
+        if analyzer is None:
+            from sentiment import SentimentAnalyzer
+            analyzer = SentimentAnalyzer()
+        self.scraper = scraper
+        self.analyzer = analyzer
+
+        self.workers = workers or int(os.environ.get('BATCH_WORKERS', 4))
+        self.per_retailer = per_retailer or int(os.environ.get('BATCH_PER_RETAILER', 2))
+        self.max_reviews = max_reviews or int(os.environ.get('MAX_REVIEWS', 100))
+        self.include_reviews = include_reviews
+
+        self._slots = {}
+        self._slots_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _retailer_slots(self, retailer):
+        with self._slots_lock:
+            if retailer not in self._slots:
+                self._slots[retailer] = threading.BoundedSemaphore(self.per_retailer)
+            return self._slots[retailer]
+
+    def plan(self, urls, completed=()):
+        """
+        Deduplicate URLs, drop finished ones and interleave retailers so one
+        slow retailer cannot hold every worker
+        Returns: list of (url, canonical_url, retailer)
+        """
+        by_retailer = {}
+        seen = set(completed)
+        for url in urls:
+            canonical = canonicalize_url(url)
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+            retailer = detect_retailer(url)
+            by_retailer.setdefault(retailer, []).append((url, canonical, retailer))
+        return [item for group in zip_longest(*by_retailer.values()) for item in group if item]
+
+    def analyze_product(self, url, canonical, retailer, profile=False):
+        """
+        Scrape and analyze one product, under the profiler if requested and allowed
+        Returns: JSON-serializable result record
+        """
+        profiler = get_profiler()
+        if retailer is None or not profiler.should_profile(profile):
+            return self._analyze_product(url, canonical, retailer)
+
+        profile_id = uuid.uuid4().hex
+        with profiler.session(profile_id, label=f'batch {url}'):
+            record = self._analyze_product(url, canonical, retailer)
+        record['profile_id'] = profile_id
+        return record
+
+    def _analyze_product(self, url, canonical, retailer):
+        started = time.time()
+        record = {'url': url, 'canonical_url': canonical, 'retailer': retailer}
+        if retailer is None:
+            record.update(status='error', error='Unsupported retailer')
+            return record
+
+        try:
+            with self._retailer_slots(retailer):
+                # Each page of reviews is scored as it arrives, while later pages load
+                reviews = self.scraper.stream_reviews(url, max_reviews=self.max_reviews)
+                table = self.analyzer.analyze_reviews_table(reviews, chunk_size=REVIEWS_PER_PAGE)
+            if not len(table):
+                record['status'] = 'no_reviews'
+            else:
+                if self.include_reviews:
+                    record['reviews'] = table.to_dicts()
+                record['status'] = 'ok'
+                record['statistics'] = self.analyzer.get_sentiment_statistics(table)
+        except Exception as e:
+            self.logger.error(f"Batch analysis of {url} failed: {e}")
+            record.update(status='error', error=str(e))
+
+        record['seconds'] = round(time.time() - started, 3)
+        return record
+
+    def _write(self, f, record):
+        with self._write_lock:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def run(self, urls, output_path, profile=False):
+        """
+        Analyze every URL, appending results to output_path as they finish.
+        With profile=True products are profiled, subject to the profiler's rate limit.
+        Returns: dict of status -> product count for this run
+        """
+        completed = load_completed(output_path)
+        tasks = self.plan(urls, completed)
+        self.logger.info(f"Batch: {len(tasks)} products to analyze, {len(completed)} already done.")
+
+        summary = {'skipped': len(completed)}
+        with open(output_path, 'a') as f, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.analyze_product, *task, profile=profile) for task in tasks]
+            for future in as_completed(futures):
+                record = future.result()
+                self._write(f, record)
+                summary[record['status']] = summary.get(record['status'], 0) + 1
+
+        self.logger.info(f"Batch finished: {summary}")
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze reviews for many products and write JSONL results.')
+    parser.add_argument('inputs', nargs='+', help="product URLs, or files of URLs ('-' for stdin)")
+    parser.add_argument('-o', '--output', required=True, help='JSONL file to append results to (resumable)')
+    parser.add_argument('--workers', type=int, help='concurrent products overall')
+    parser.add_argument('--per-retailer', type=int, help='concurrent products per retailer')
+    parser.add_argument('--max-reviews', type=int, help='reviews to collect per product')
+    parser.add_argument('--no-reviews', action='store_true', help='write statistics only, not every review')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile products (rate-limited by PROFILE_MAX_PER_MINUTE) into PROFILE_DIR')
+    args = parser.parse_args(argv)
+
+    urls = []
+    for item in args.inputs:
+        urls.extend([item] if item.startswith(('http://', 'https://')) else read_urls(item))
+
+    runner = BatchRunner(workers=args.workers, per_retailer=args.per_retailer,
+                         max_reviews=args.max_reviews, include_reviews=not args.no_reviews)
+    summary = runner.run(urls, args.output, profile=args.profile)
+    print(json.dumps(summary))
+    return 1 if summary.get('error') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Compare full-page html.parser parsing against make_soup's fast backend with
+per-retailer review strainers, and check both produce identical reviews.
+
+    python -m benchmarks.bench_parsing [--reviews 50] [--filler 5000] [--repeat 5]
+"""
+
+import sys
+import time
+import argparse
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fixtures import build_page
+from html_parsing import make_soup, PARSER_BACKEND
+from retailers import RETAILERS
+from smart_scraper import SmartScraper
+
+
+def best_of(repeat, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=50)
+    parser.add_argument('--filler', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # The parse methods only use their arguments, so no browser is needed
+    parse = SmartScraper._parse.__get__(SmartScraper.__new__(SmartScraper))
+    failed = False
+
+    print(f"backend: {PARSER_BACKEND}")
+    for retailer in RETAILERS:
+        page = build_page(retailer, reviews=args.reviews, filler_blocks=args.filler)
+
+        baseline_time, expected = best_of(args.repeat, lambda: parse(BeautifulSoup(page, 'html.parser'), retailer, args.reviews))
+        fast_time, actual = best_of(args.repeat, lambda: parse(make_soup(page, retailer), retailer, args.reviews))
+
+        # Two empty results would compare equal without proving anything
+        identical = bool(expected) and expected == actual
+        failed = failed or not identical
+        print(f"{retailer:9} {len(page) / 1e6:5.1f} MB  html.parser {baseline_time * 1000:8.1f} ms  "
+              f"make_soup {fast_time * 1000:8.1f} ms  speedup {baseline_time / fast_time:5.1f}x  "
+              f"reviews={len(expected)}  identical={identical}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Measure app startup cost: wall time to import a module in a fresh
+interpreter, the slowest imports from python -X importtime, and which heavy
+dependencies got loaded at import time instead of on first use.
+
+    python -m benchmarks.bench_startup [--module app] [--top 15] [--repeat 3] [--preload] [--json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Dependencies that should only load on first use
+HEAVY_MODULES = ('matplotlib', 'textblob', 'nltk', 'selenium', 'webdriver_manager')
+
+PROBE = (
+    "import sys, json, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps([elapsed, sorted(name for name in {heavy!r} if name in sys.modules)]))\n"
+)
+
+
+def probe_env(preload):
+    env = dict(os.environ)
+    # Startup should not depend on a real chromedriver being installed
+    env.setdefault('CHROMEDRIVER_PATH', sys.executable)
+    env['APP_PRELOAD'] = '1' if preload else '0'
+    return env
+
+
+def import_wall_time(module, env):
+    """
+    Import module in a fresh interpreter
+    Returns: (seconds, heavy modules loaded)
+    """
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    seconds, loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return seconds, loaded
+
+
+def import_times(module, env):
+    """
+    Per-module import cost from -X importtime
+    Returns: list of (module, self_us, cumulative_us), slowest cumulative first
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--preload', action='store_true', help='import with APP_PRELOAD=1')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    env = probe_env(args.preload)
+    runs = [import_wall_time(args.module, env) for _ in range(args.repeat)]
+    best = min(seconds for seconds, _ in runs)
+    loaded = runs[-1][1]
+    slowest = import_times(args.module, env)[:args.top]
+
+    if args.json:
+        print(json.dumps({
+            'module': args.module,
+            'preload': args.preload,
+            'import_seconds': round(best, 4),
+            'heavy_modules_loaded': loaded,
+            'slowest_imports': [{'module': name, 'self_us': self_us, 'cumulative_us': cumulative_us}
+                                for name, self_us, cumulative_us in slowest]
+        }, indent=2))
+    else:
+        print(f"import {args.module}: {best * 1000:.1f} ms (best of {args.repeat}), preload={args.preload}")
+        print(f"heavy modules loaded at import: {', '.join(loaded) or 'none'}")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for name, self_us, cumulative_us in slowest:
+            print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
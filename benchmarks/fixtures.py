@@ -0,0 +1,120 @@
+"""
+Synthetic retailer pages for offline benchmarks.
+Each page mirrors the review markup the scrapers expect, surrounded by enough
+product-page filler (carousels, scripts, recommendations) to reach the
+multi-megabyte size of a real Amazon or Flipkart page.
+"""
+
+import os
+import random
+
+WORDS = (
+    'great good excellent amazing poor bad terrible awful okay average decent '
+    'quality price value battery screen delivery packaging fit size colour fabric '
+    'comfortable cheap expensive broke works perfectly recommend avoid love hate '
+    'fast slow happy disappointed product phone shirt shoes bag sound camera'
+).split()
+
+REVIEW_TEMPLATES = {
+    'amazon': (
+        '<div data-hook="review" class="a-section review aok-relative" id="R{i}">'
+        '<div class="a-row"><a class="a-profile"><div class="a-profile-content">'
+        '<span class="a-profile-name">{author}</span></div></a></div>'
+        '<div class="a-row"><a class="a-link-normal"><i data-hook="review-star-rating" class="a-icon a-icon-star">'
+        '<span class="a-icon-alt">{rating}.0 out of 5 stars</span></i></a></div>'
+        '<div class="a-row review-data"><span data-hook="review-body" class="a-size-base review-text">'
+        '<span>{text}</span></span></div></div>'
+    ),
+    'flipkart': (
+        '<div class="col _2wzgFH K0kLPL"><div class="_27M-vq"><div class="row">'
+        '<div class="_3LWZlK _1BLPMq">{rating}</div><p class="_2-N8zT">Review {i}</p></div>'
+        '<div class="t-ZTKy"><div><div class="">{text}</div></div></div>'
+        '<div class="row _3n8db9"><p class="_2sc7ZR _2V5EHH">{author}</p></div></div></div>'
+    ),
+    'myntra': (
+        '<div class="user-review-userReviewWrapper"><div class="user-review-main">'
+        '<div class="user-review-ratings"><div>{rating}</div></div>'
+        '<div class="user-review-reviewText">{text}</div></div>'
+        '<div class="user-review-footer"><span>{author}</span></div></div>'
+    ),
+    'jiomart': (
+        '<div class="review-card"><div class="reviewer-name">{author}</div>'
+        '<span class="rating-star">{rating}</span>'
+        '<div class="review-text"><p>{text}</p></div></div>'
+    )
+}
+
+FILLER_BLOCK = (
+    '<div class="carousel-item"><a href="/p/item{i}"><img src="/img/{i}.jpg" alt="Item {i}" '
+    'srcset="/img/{i}_2x.jpg 2x"><span class="title">Recommended product {i}</span>'
+    '<span class="price">Rs. {price}</span></a></div>'
+    '<script type="application/json">{{"sku": "SKU{i}", "tracking": [1, 2, 3], "price": {price}}}</script>'
+)
+
+
+def review_text(rng, words=25):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def build_page(retailer, reviews=50, filler_blocks=5000, seed=0):
+    """
+    Build one synthetic product page for a retailer
+    Returns: HTML string
+    """
+    rng = random.Random(seed)
+    template = REVIEW_TEMPLATES[retailer]
+
+    filler = [FILLER_BLOCK.format(i=i, price=rng.randint(99, 99999)) for i in range(filler_blocks)]
+    review_html = ''.join(
+        template.format(i=i, author=f"Customer {i}", rating=rng.randint(1, 5), text=review_text(rng))
+        for i in range(reviews)
+    )
+    # Split between blocks, never inside a tag
+    half = len(filler) // 2
+    return (
+        f'<!DOCTYPE html><html><head><title>{retailer} product</title>'
+        f'<script>window.__STATE__ = {{"page": "product"}};</script></head><body>'
+        f'<div id="header">{"".join(filler[:half])}</div>'
+        f'<div id="reviews-section">{review_html}</div>'
+        f'<div id="footer">{"".join(filler[half:])}</div></body></html>'
+    )
+
+
+def build_corpus(size, seed=0):
+    """
+    Synthetic scraped reviews for sentiment benchmarks
+    Returns: list of review dicts like the scrapers produce
+    """
+    rng = random.Random(seed)
+    # Real products repeat a lot of short reviews; keep some duplicates
+    distinct = [review_text(rng, rng.randint(5, 40)) for _ in range(max(1, size // 4))]
+    return [
+        {'text': rng.choice(distinct), 'author': f"Customer {i}", 'rating': str(rng.randint(1, 5))}
+        for i in range(size)
+    ]
+
+
+def load_fixture(retailer, directory=None, reviews=50, filler_blocks=5000):
+    """
+    A saved page from directory/<retailer>.html if there is one (e.g. a real
+    product page captured with save-as), otherwise a synthetic page
+    Returns: HTML string
+    """
+    if directory:
+        path = os.path.join(directory, f'{retailer}.html')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+    return build_page(retailer, reviews=reviews, filler_blocks=filler_blocks)
+
+
+def save_fixtures(directory, reviews=50, filler_blocks=5000):
+    """Write a synthetic page per retailer to directory; returns the paths written"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for retailer in REVIEW_TEMPLATES:
+        path = os.path.join(directory, f'{retailer}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(build_page(retailer, reviews=reviews, filler_blocks=filler_blocks))
+        paths.append(path)
+    return paths
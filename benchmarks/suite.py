@@ -0,0 +1,296 @@
+"""
+Offline benchmark suite for the scrape -> analyze -> chart hot paths.
+Retailer pages (saved fixtures, or synthetic ones) are served from a local
+HTTP server, so no live retailer is ever contacted. Each stage is timed
+separately and the results are written as JSON; given a baseline file, any
+stage that got slower than the tolerance fails the run.
+
+    python -m benchmarks.suite [--sizes 100,1000,10000] [--repeat 3] [--fixtures DIR]
+                               [--output results.json] [--baseline baseline.json] [--tolerance 0.2]
+    python -m benchmarks.suite --save-fixtures DIR
+
+Stages:
+    fetch.<retailer>              GET the page from the local server through http_session.fetch
+    soup.html_parser.<retailer>   BeautifulSoup(page, 'html.parser') on the full page
+    soup.make_soup.<retailer>     make_soup with the fast backend and review strainer
+    parse.<retailer>              SmartScraper._parse_<retailer> on a ready soup
+    analyze_reviews.<n>           SentimentAnalyzer.analyze_reviews on n reviews, cold cache
+    aggregate.<n>                 counts, groups, statistics and top reviews over n analyzed reviews
+    aggregate_table.<n>           the same over a ReviewTable
+    chart.png / chart.svg         one uncached chart render
+    analyze_endpoint.<retailer>   POST /analyze through the Flask test client until the results page renders
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from benchmarks.fixtures import load_fixture, save_fixtures, build_corpus, REVIEW_TEMPLATES
+
+DEFAULT_SIZES = (100, 1000, 10000)
+# Differences smaller than this are timer noise, not regressions
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def measure(repeat, func, setup=None):
+    """
+    Run func repeat times, calling setup (untimed) before each run
+    Returns: dict with best and median seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        arguments = (setup(),) if setup else ()
+        start = time.perf_counter()
+        func(*arguments)
+        timings.append(time.perf_counter() - start)
+    return {'best': min(timings), 'median': statistics.median(timings), 'runs': repeat}
+
+
+class FixtureServer:
+    """Serve one page per retailer at http://127.0.0.1:<port>/<retailer> from a background thread"""
+
+    def __init__(self, pages):
+        pages = {f'/{retailer}': page.encode('utf-8') for retailer, page in pages.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = pages.get(self.path.split('?')[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, retailer):
+        return f'http://127.0.0.1:{self.server.server_address[1]}/{retailer}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FixtureScraper:
+    """Stands in for SmartScraper in the app: fetch from the fixture server, parse with the real parsers"""
+
+    def __init__(self, parse):
+        self.parse = parse
+
+    def stream_reviews(self, url, max_reviews=20, newest_first=False):
+        from http_session import fetch
+        from html_parsing import make_soup
+
+        retailer = url.rstrip('/').rsplit('/', 1)[-1]
+        response = fetch(url, rate_limit=False)
+        reviews = self.parse(make_soup(response.text, retailer), retailer, max_reviews)
+        if not reviews:
+            raise RuntimeError(f'No reviews parsed from the {retailer} fixture')
+        yield from reviews
+
+
+def bench_pages(results, server, pages, repeat):
+    from bs4 import BeautifulSoup
+    from http_session import fetch
+    from html_parsing import make_soup
+    from smart_scraper import SmartScraper
+
+    # The parse methods only use their arguments, so no browser is needed
+    scraper = SmartScraper.__new__(SmartScraper)
+    for retailer, page in pages.items():
+        url = server.url(retailer)
+        results[f'fetch.{retailer}'] = measure(repeat, lambda: fetch(url, rate_limit=False).text)
+        results[f'soup.html_parser.{retailer}'] = measure(repeat, lambda: BeautifulSoup(page, 'html.parser'))
+        results[f'soup.make_soup.{retailer}'] = measure(repeat, lambda: make_soup(page, retailer))
+
+        soup = make_soup(page, retailer)
+        parse = getattr(scraper, f'_parse_{retailer}')
+        if not parse(soup, 10 ** 9):
+            raise RuntimeError(f'No reviews parsed from the {retailer} fixture')
+        results[f'parse.{retailer}'] = measure(repeat, lambda: parse(soup, 10 ** 9))
+
+
+def bench_corpus(results, sizes, repeat):
+    from aggregators import consume, SentimentCounts, SentimentGroups, SentimentStats, TopReviews
+    from results_table import ReviewTable
+    from sentiment import SentimentAnalyzer
+    from sentiment_cache import SentimentCache
+
+    # Import TextBlob and load its lexicon before anything is timed
+    SentimentAnalyzer(cache=SentimentCache(db_path=None)).analyze_sentiment('warm up')
+
+    for size in sizes:
+        corpus = build_corpus(size)
+        # A fresh cache per run so every run scores the corpus cold
+        results[f'analyze_reviews.{size}'] = measure(
+            repeat,
+            lambda analyzer: analyzer.analyze_reviews([dict(review) for review in corpus]),
+            setup=lambda: SentimentAnalyzer(cache=SentimentCache(max_entries=size, db_path=None))
+        )
+
+        analyzer = SentimentAnalyzer(cache=SentimentCache(max_entries=size, db_path=None))
+        analyzed = analyzer.analyze_reviews([dict(review) for review in corpus])
+        results[f'aggregate.{size}'] = measure(repeat, lambda: [
+            aggregator.result() for aggregator in consume(
+                analyzed, SentimentCounts(), SentimentGroups(), SentimentStats(), TopReviews())
+        ])
+
+        table = ReviewTable.from_reviews(analyzed)
+        results[f'aggregate_table.{size}'] = measure(repeat, lambda: (
+            table.sentiment_counts(), table.group_by_sentiment(), table.statistics(), table.top_positive_negative()
+        ))
+
+
+def bench_charts(results, repeat):
+    import charts
+
+    counts = {'Positive': 120, 'Negative': 30, 'Neutral': 50}
+    # Import matplotlib before anything is timed
+    charts.render_chart({'Positive': 1}, 'png')
+    for fmt in ('png', 'svg'):
+        # Clear the render cache so each run draws the chart
+        results[f'chart.{fmt}'] = measure(repeat, lambda _: charts.render_chart(counts, fmt),
+                                          setup=charts._render_cached.cache_clear)
+
+
+def bench_endpoint(results, server, retailers, repeat):
+    # Importing the app must not require a real chromedriver
+    os.environ.setdefault('CHROMEDRIVER_PATH', sys.executable)
+    # Time the full scrape and analysis on every run; the review store would
+    # answer repeats from the database
+    os.environ['REVIEW_STORE_DB'] = ''
+    import app as web
+    from smart_scraper import SmartScraper
+
+    web._services['scraper'] = FixtureScraper(SmartScraper._parse.__get__(SmartScraper.__new__(SmartScraper)))
+    client = web.app.test_client()
+
+    def analyze(url, retailer):
+        response = client.post('/analyze', data={'product_url': url, 'scraper_choice': retailer},
+                               headers={'Accept': 'application/json'})
+        status_url, results_url = response.json['status_url'], response.json['results_url']
+        status = client.get(status_url).json
+        while status['status'] in ('pending', 'running'):
+            time.sleep(0.002)
+            status = client.get(status_url).json
+        if status['status'] != 'done':
+            raise RuntimeError(f"/analyze for {retailer} ended {status['status']}: {status.get('error')}")
+        # Failed or empty analyses also answer 200, with the index page and a flash message
+        page = client.get(results_url)
+        if page.status_code != 200 or b'Sentiment Analysis Results' not in page.data:
+            raise RuntimeError(f'/analyze for {retailer} returned no results page ({page.status_code})')
+
+    for retailer in retailers:
+        url = server.url(retailer)
+        results[f'analyze_endpoint.{retailer}'] = measure(repeat, lambda: analyze(url, retailer))
+
+
+def compare(results, baseline, tolerance):
+    """
+    Stages whose best time exceeds the baseline by more than tolerance
+    Returns: list of (stage, baseline seconds, current seconds)
+    """
+    regressions = []
+    for stage, timing in results.items():
+        previous = baseline.get('results', {}).get(stage)
+        if not previous:
+            continue
+        if timing['best'] > previous['best'] * (1 + tolerance) and timing['best'] - previous['best'] > MIN_REGRESSION_SECONDS:
+            regressions.append((stage, previous['best'], timing['best']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated corpus sizes, e.g. 100,1000,10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--fixtures', help='directory of saved <retailer>.html pages; synthetic pages otherwise')
+    parser.add_argument('--reviews', type=int, default=50, help='reviews per synthetic page')
+    parser.add_argument('--filler', type=int, default=5000, help='filler blocks per synthetic page')
+    parser.add_argument('--output', help='write results JSON here (stdout otherwise)')
+    parser.add_argument('--baseline', help='fail if any stage is slower than this results JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown versus the baseline')
+    parser.add_argument('--skip', default='', help='comma-separated stage groups to skip: pages,corpus,charts,endpoint')
+    parser.add_argument('--save-fixtures', metavar='DIR', help='write synthetic pages to DIR and exit')
+    args = parser.parse_args(argv)
+
+    if args.save_fixtures:
+        for path in save_fixtures(args.save_fixtures, reviews=args.reviews, filler_blocks=args.filler):
+            print(path)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    skip = set(args.skip.split(','))
+    pages = {retailer: load_fixture(retailer, args.fixtures, reviews=args.reviews, filler_blocks=args.filler)
+             for retailer in REVIEW_TEMPLATES}
+
+    from html_parsing import PARSER_BACKEND
+
+    results = {}
+    with FixtureServer(pages) as server:
+        if 'pages' not in skip:
+            bench_pages(results, server, pages, args.repeat)
+        if 'corpus' not in skip:
+            bench_corpus(results, sizes, args.repeat)
+        if 'charts' not in skip:
+            bench_charts(results, args.repeat)
+        if 'endpoint' not in skip:
+            bench_endpoint(results, server, pages, args.repeat)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parser_backend': PARSER_BACKEND,
+            'fixtures': args.fixtures or 'synthetic',
+            'sizes': sizes,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    for stage, timing in results.items():
+        print(f"{stage:32} best {timing['best'] * 1000:10.2f} ms  median {timing['median'] * 1000:10.2f} ms",
+              file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for stage, previous, current in regressions:
+            print(f"REGRESSION {stage}: {previous * 1000:.2f} ms -> {current * 1000:.2f} ms "
+                  f"({current / previous:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
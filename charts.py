@@ -0,0 +1,105 @@
+"""
+Sentiment distribution charts.
+Charts are rendered from the sentiment counts alone, so identical counts give
+identical images and renders are cached by the counts tuple. PNGs use
+matplotlib's object-oriented Figure API (no global pyplot state, no lock) and
+matplotlib is only imported the first time a PNG is actually drawn. SVGs are
+built directly and need no matplotlib at all.
+"""
+
+import os
+import io
+import logging
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from metrics import STAGE_SECONDS
+
+SENTIMENT_COLORS = ('#2ecc71', '#e74c3c', '#95a5a6')
+CHART_TITLE = 'Product Review Sentiment Distribution'
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+CHART_FORMAT = os.environ.get('CHART_FORMAT', 'png')
+CHART_CACHE_SIZE = int(os.environ.get('CHART_CACHE_SIZE', 256))
+
+logger = logging.getLogger(__name__)
+
+
+def chart_key(sentiment_counts):
+    """
+    Hashable cache key for a counts dict; key order is kept because it is the bar order
+    Returns: tuple of (label, count) pairs
+    """
+    return tuple((label, int(count)) for label, count in sentiment_counts.items())
+
+
+def render_chart(sentiment_counts, fmt='png'):
+    """
+    Render a sentiment chart, reusing an earlier render of the same counts
+    Returns: image bytes
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    return _render_cached(chart_key(sentiment_counts), fmt)
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _render_cached(key, fmt):
+    with STAGE_SECONDS.time(stage=f'chart_{fmt}'):
+        if fmt == 'svg':
+            return render_svg(key).encode('utf-8')
+        return render_png(key)
+
+
+def render_png(key):
+    """Draw the bar chart on a standalone Figure; returns PNG bytes"""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sentiments = [label for label, _ in key]
+    counts = [count for _, count in key]
+    bars = ax.bar(sentiments, counts, color=SENTIMENT_COLORS[:len(sentiments)])
+    ax.set_title(CHART_TITLE, fontsize=16, fontweight='bold')
+    ax.set_xlabel('Sentiment', fontsize=12)
+    ax.set_ylabel('Number of Reviews', fontsize=12)
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height, f'{int(height)}', ha='center', va='bottom', fontweight='bold')
+    fig.tight_layout()
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format='png')
+    return img_buffer.getvalue()
+
+
+def render_svg(key, width=1000, height=600):
+    """Draw the same bar chart as plain SVG markup; returns an SVG string"""
+    left, right, top, bottom = 80, 30, 70, 70
+    plot_width = width - left - right
+    plot_height = height - top - bottom
+    peak = max([count for _, count in key] + [1])
+    slot = plot_width / max(len(key), 1)
+    bar_width = slot * 0.8
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+        f'width="{width}" height="{height}" font-family="sans-serif">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<text x="{width / 2}" y="40" text-anchor="middle" font-size="22" font-weight="bold">{CHART_TITLE}</text>',
+        f'<line x1="{left}" y1="{top + plot_height}" x2="{left + plot_width}" y2="{top + plot_height}" stroke="#333"/>',
+        f'<line x1="{left}" y1="{top}" x2="{left}" y2="{top + plot_height}" stroke="#333"/>',
+        f'<text x="{left + plot_width / 2}" y="{height - 20}" text-anchor="middle" font-size="16">Sentiment</text>',
+        f'<text x="25" y="{top + plot_height / 2}" text-anchor="middle" font-size="16" '
+        f'transform="rotate(-90 25 {top + plot_height / 2})">Number of Reviews</text>'
+    ]
+    for i, (label, count) in enumerate(key):
+        bar_height = plot_height * count / peak
+        x = left + slot * i + (slot - bar_width) / 2
+        y = top + plot_height - bar_height
+        color = SENTIMENT_COLORS[i % len(SENTIMENT_COLORS)]
+        parts.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{bar_width:.1f}" height="{bar_height:.1f}" fill="{color}"/>')
+        parts.append(f'<text x="{x + bar_width / 2:.1f}" y="{y - 6:.1f}" text-anchor="middle" '
+                     f'font-size="16" font-weight="bold">{count}</text>')
+        parts.append(f'<text x="{x + bar_width / 2:.1f}" y="{top + plot_height + 22}" text-anchor="middle" '
+                     f'font-size="15">{escape(label)}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
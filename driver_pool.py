@@ -0,0 +1,191 @@
+"""
+Pool of long-lived headless Chrome drivers shared by the Selenium scrapers.
+Drivers are checked out per request, reset between uses and recycled after
+a fixed number of pages or when they stop responding.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+from driver_resolver import resolve_chromedriver
+from metrics import STAGE_SECONDS, DRIVER_CRASHES
+
+
+class DriverPoolExhausted(Exception):
+    """Raised when no driver could be checked out before the timeout"""
+
+
+class DriverPool:
+    def __init__(self, chrome_options, size=None, max_pages=None, checkout_timeout=None):
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        self.chrome_options = chrome_options
+        self.size = size or int(os.environ.get('DRIVER_POOL_SIZE', 2))
+        self.max_pages = max_pages or int(os.environ.get('DRIVER_POOL_MAX_PAGES', 50))
+        self.checkout_timeout = checkout_timeout or float(os.environ.get('DRIVER_POOL_TIMEOUT', 60))
+
+        # Idle drivers wait here; None is a free slot that is filled lazily
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        for _ in range(self.size):
+            self._idle.put(None)
+
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._created = 0
+        self._recycled = 0
+
+    def _create_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service as ChromeService
+
+        with STAGE_SECONDS.time(stage='driver_launch'):
+            driver = webdriver.Chrome(service=ChromeService(resolve_chromedriver()), options=self.chrome_options)
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        with self._lock:
+            self._created += 1
+        self._pages[id(driver)] = 0
+        return driver
+
+    def _is_healthy(self, driver):
+        """Check that the browser process still answers commands"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Clear cookies and storage so no state leaks between requests"""
+        # delete_all_cookies() only reaches the current origin; CDP clears the whole browser
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        origin = driver.execute_script("return window.location.origin")
+        if origin and origin.startswith('http'):
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.get("about:blank")
+
+    def _discard(self, driver):
+        self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error closing driver: {e}")
+        with self._lock:
+            self._recycled += 1
+
+    @contextmanager
+    def driver(self):
+        """
+        Check out a ready-to-use driver for the duration of the with-block.
+        The driver is recycled if the block raises and it no longer responds.
+        """
+        start = time.monotonic()
+        try:
+            driver = self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise DriverPoolExhausted(f"No driver available after {self.checkout_timeout}s")
+        waited = time.monotonic() - start
+        STAGE_SECONDS.observe(waited, stage='driver_checkout')
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        failed = False
+        try:
+            if driver is not None and not self._is_healthy(driver):
+                self.logger.warning("Pooled driver failed health check, replacing it.")
+                DRIVER_CRASHES.inc(phase='checkout')
+                self._discard(driver)
+                driver = None
+            if driver is None:
+                driver = self._create_driver()
+
+            yield driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(driver, failed)
+
+    def _release(self, driver, failed):
+        try:
+            if driver is not None:
+                self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+                # A failed page only costs the browser if it stopped responding
+                crashed = failed and not self._is_healthy(driver)
+                if crashed:
+                    DRIVER_CRASHES.inc(phase='page')
+                if crashed or self._pages[id(driver)] >= self.max_pages:
+                    self._discard(driver)
+                    driver = None
+                else:
+                    try:
+                        self._reset(driver)
+                    except Exception as e:
+                        self.logger.warning(f"Could not reset driver, recycling it: {e}")
+                        self._discard(driver)
+                        driver = None
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(driver)
+
+    def stats(self):
+        """
+        Report pool wait time and utilization
+        Returns: dict of pool counters
+        """
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'utilization': round(self._in_use / self.size, 3),
+                'checkouts': self._checkouts,
+                'avg_wait': round(self._total_wait / self._checkouts, 3) if self._checkouts else 0.0,
+                'max_wait': round(self._max_wait, 3),
+                'created': self._created,
+                'recycled': self._recycled
+            }
+
+    def close(self):
+        """Quit every idle driver, leaving their slots free for later use"""
+        drained = []
+        while True:
+            try:
+                drained.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for driver in drained:
+            if driver is not None:
+                self._discard(driver)
+            self._idle.put(None)
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_driver_pool(chrome_options_factory):
+    """
+    Process-wide pool shared by every Selenium scraper, so a process never runs
+    more than DRIVER_POOL_SIZE browsers. chrome_options_factory is only called
+    by whichever scraper creates the pool.
+    Returns: the shared DriverPool
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = DriverPool(chrome_options_factory())
+    return _shared_pool
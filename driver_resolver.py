@@ -0,0 +1,92 @@
+"""
+Locates the chromedriver binary once per process.
+Resolution never touches the network; the binary is either pinned via the
+CHROMEDRIVER_PATH environment variable, recorded in a path file at build
+time (see render_build.sh), or found on PATH.
+"""
+
+import os
+import shutil
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH_FILE = os.path.join(BASE_DIR, '.chromedriver-path')
+DEFAULT_INSTALL_DIR = os.path.join(BASE_DIR, 'bin')
+
+_lock = threading.Lock()
+_resolved_path = None
+
+
+class ChromeDriverNotFound(RuntimeError):
+    """Raised when no usable chromedriver binary can be located"""
+
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _candidates():
+    """Yield (source, path) pairs in priority order"""
+    yield 'CHROMEDRIVER_PATH', os.environ.get('CHROMEDRIVER_PATH')
+
+    path_file = os.environ.get('CHROMEDRIVER_PATH_FILE', DEFAULT_PATH_FILE)
+    if os.path.isfile(path_file):
+        with open(path_file) as f:
+            yield path_file, f.read().strip()
+
+    yield 'PATH', shutil.which('chromedriver')
+
+
+def resolve_chromedriver():
+    """
+    Return the chromedriver path, resolving it on first call only
+    Returns: absolute path to an executable chromedriver
+    """
+    global _resolved_path
+    if _resolved_path:
+        return _resolved_path
+
+    with _lock:
+        if _resolved_path:
+            return _resolved_path
+
+        for source, path in _candidates():
+            if _is_executable(path):
+                _resolved_path = os.path.abspath(path)
+                logger.info(f"Using chromedriver at {_resolved_path} (from {source})")
+                return _resolved_path
+            if path:
+                logger.warning(f"Ignoring chromedriver candidate {path} from {source}: not an executable file")
+
+    raise ChromeDriverNotFound(
+        "chromedriver not found. Set CHROMEDRIVER_PATH, run render_build.sh, or put chromedriver on PATH."
+    )
+
+
+def ensure_chromedriver():
+    """Resolve the binary at boot so a missing driver fails fast"""
+    return resolve_chromedriver()
+
+
+def install_chromedriver(path_file=DEFAULT_PATH_FILE, install_dir=DEFAULT_INSTALL_DIR):
+    """
+    Download chromedriver with webdriver-manager, copy it next to the app
+    and record its location. Meant for build time only; this is the one
+    place allowed to use the network.
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    os.makedirs(install_dir, exist_ok=True)
+    path = shutil.copy2(ChromeDriverManager().install(), os.path.join(install_dir, 'chromedriver'))
+    with open(path_file, 'w') as f:
+        f.write(path)
+    logger.info(f"Installed chromedriver to {path}, recorded in {path_file}")
+    return path
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(install_chromedriver())
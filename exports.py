@@ -0,0 +1,222 @@
+"""
+Streaming exports of analyzed reviews.
+Rows are pulled from an iterable (normally ReviewStore.iter_reviews) and
+written out chunk_size rows at a time, so an export of 100k reviews needs
+no more memory than one of 100. CSV and JSONL need only the standard
+library; Parquet needs the optional pyarrow package and is written one row
+group per chunk.
+
+    python exports.py "<product url>" --format jsonl --sentiment Negative --max-rating 2 -o negative.jsonl
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import argparse
+import logging
+from itertools import islice
+
+from results_table import SENTIMENT_LABELS, parse_rating, NO_RATING
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+EXPORT_FIELDS = ('text', 'author', 'rating', 'sentiment', 'polarity', 'subjectivity')
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+logger = logging.getLogger(__name__)
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        return False
+    return True
+
+
+def sentiment_label(value):
+    """
+    Match a sentiment filter case-insensitively
+    Returns: the label as stored, or None if value names no sentiment
+    """
+    return next((label for label in SENTIMENT_LABELS if label.lower() == value.strip().lower()), None)
+
+
+def filter_reviews(reviews, min_rating=None, max_rating=None):
+    """Keep reviews whose parsed rating lies within the bounds; unrated reviews fail any bound"""
+    if min_rating is None and max_rating is None:
+        yield from reviews
+        return
+    for review in reviews:
+        rating = parse_rating(review.get('rating'))
+        if rating == NO_RATING:
+            continue
+        if (min_rating is None or rating >= min_rating) and (max_rating is None or rating <= max_rating):
+            yield review
+
+
+def _chunks(reviews, chunk_size):
+    reviews = iter(reviews)
+    while True:
+        chunk = list(islice(reviews, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _export_row(review, truncate=None):
+    row = {field: review.get(field) for field in EXPORT_FIELDS}
+    if truncate and len(row['text']) > truncate:
+        row['text'] = row['text'][:truncate] + '...'
+    return row
+
+
+def iter_csv(reviews, chunk_size=EXPORT_CHUNK_SIZE, truncate=None):
+    """
+    CSV export, header first; truncate shortens review text like the old
+    export_results_csv did, None keeps it whole
+    Returns: generator of str chunks
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    for chunk in _chunks(reviews, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_export_row(review, truncate) for review in chunk)
+        yield buffer.getvalue()
+
+
+def iter_jsonl(reviews, chunk_size=EXPORT_CHUNK_SIZE, truncate=None):
+    """
+    JSON Lines export, one review object per line
+    Returns: generator of str chunks
+    """
+    for chunk in _chunks(reviews, chunk_size):
+        yield ''.join(json.dumps(_export_row(review, truncate), ensure_ascii=False) + '\n' for review in chunk)
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_parquet(reviews, chunk_size=EXPORT_CHUNK_SIZE, truncate=None):
+    """
+    Parquet export with one row group per chunk; needs pyarrow
+    Returns: generator of bytes chunks
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('text', pa.string()),
+        ('author', pa.string()),
+        ('rating', pa.int8()),
+        ('sentiment', pa.dictionary(pa.int8(), pa.string())),
+        ('polarity', pa.float32()),
+        ('subjectivity', pa.float32())
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    try:
+        for chunk in _chunks(reviews, chunk_size):
+            rows = [_export_row(review, truncate) for review in chunk]
+            for row in rows:
+                rating = parse_rating(row['rating'])
+                row['rating'] = None if rating == NO_RATING else rating
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORTERS = {'csv': iter_csv, 'jsonl': iter_jsonl, 'parquet': iter_parquet}
+
+
+def export_reviews(reviews, fmt='csv', sentiment=None, min_rating=None, max_rating=None,
+                   chunk_size=EXPORT_CHUNK_SIZE, truncate=None):
+    """
+    Stream reviews in the given format. The sentiment filter is only applied
+    here when the source could not apply it (pass the store's filtered cursor
+    where possible)
+    Returns: generator of str (csv, jsonl) or bytes (parquet) chunks
+    """
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if sentiment:
+        reviews = (review for review in reviews if review.get('sentiment') == sentiment)
+    return EXPORTERS[fmt](filter_reviews(reviews, min_rating, max_rating), chunk_size=chunk_size, truncate=truncate)
+
+
+def main():
+    from review_store import ReviewStore
+
+    parser = argparse.ArgumentParser(description='Export a product\'s stored reviews as CSV, JSONL or Parquet.')
+    parser.add_argument('url', help='product URL as analyzed earlier')
+    parser.add_argument('--format', choices=sorted(EXPORTERS), default='csv')
+    parser.add_argument('--sentiment', help='only reviews with this sentiment (Positive, Negative, Neutral)')
+    parser.add_argument('--min-rating', type=int)
+    parser.add_argument('--max-rating', type=int)
+    parser.add_argument('--db', default=os.environ.get('REVIEW_STORE_DB', 'reviews.sqlite3'), help='review store database')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+
+    sentiment = sentiment_label(args.sentiment) if args.sentiment else None
+    if args.sentiment and not sentiment:
+        parser.error(f"--sentiment must be one of {', '.join(SENTIMENT_LABELS)}")
+    if args.format == 'parquet' and not parquet_available():
+        parser.error('Parquet export needs pyarrow (pip install pyarrow)')
+    if args.format == 'parquet' and not args.output:
+        parser.error('Parquet export needs --output')
+
+    store = ReviewStore(args.db)
+    product = store.get_product(args.url)
+    if product is None:
+        parser.error(f"No stored reviews for {args.url}; analyze it first")
+
+    chunks = export_reviews(store.iter_reviews(product['id'], sentiment=sentiment), args.format,
+                            min_rating=args.min_rating, max_rating=args.max_rating)
+    binary = args.format == 'parquet'
+    if args.output:
+        with open(args.output, 'wb' if binary else 'w', **({} if binary else {'newline': '', 'encoding': 'utf-8'})) as f:
+            for chunk in chunks:
+                f.write(chunk)
+    else:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
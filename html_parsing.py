@@ -0,0 +1,39 @@
+"""
+HTML parsing helpers shared by the scrapers.
+Uses lxml when it is installed and falls back to Python's html.parser.
+When a retailer is given, only its review containers are built into the
+tree (via a SoupStrainer), which skips the bulk of a product page.
+"""
+
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+
+from retailers import REVIEW_CONTAINERS
+
+
+def _pick_backend():
+    forced = os.environ.get('HTML_PARSER')
+    if forced:
+        return forced
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+PARSER_BACKEND = _pick_backend()
+
+REVIEW_STRAINERS = {
+    retailer: SoupStrainer(name, attrs=attrs)
+    for retailer, (name, attrs) in REVIEW_CONTAINERS.items()
+}
+
+
+def make_soup(markup, retailer=None, backend=None):
+    """
+    Parse markup with the fastest available backend
+    Returns: BeautifulSoup tree, limited to review containers if retailer is given
+    """
+    parse_only = REVIEW_STRAINERS.get(retailer) if retailer else None
+    return BeautifulSoup(markup, backend or PARSER_BACKEND, parse_only=parse_only)
@@ -0,0 +1,134 @@
+"""
+Shared HTTP session layer for all requests-based scrapers.
+One pooled session per process keeps connections alive between fetches
+so repeat requests to a retailer skip the TCP and TLS handshakes. fetch()
+adds connect/read timeouts, per-domain rate limiting and retries with
+jittered exponential backoff, honouring Retry-After on 429 and 503 responses.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (
+    float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5)),
+    float(os.environ.get('HTTP_READ_TIMEOUT', 15))
+)
+DEFAULT_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', 0.5))
+BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', 30))
+
+# Responses worth retrying; 429 and 503 usually carry Retry-After
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Responses that mean the retailer wants us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+_lock = threading.Lock()
+_session = None
+
+
+def create_session(host_pools=None, pool_size=None):
+    """
+    Build a session with one connection pool per host.
+    host_pools is how many hosts keep a pool; pool_size is connections per host.
+    """
+    host_pools = host_pools or int(os.environ.get('HTTP_HOST_POOLS', 10))
+    pool_size = pool_size or int(os.environ.get('HTTP_POOL_SIZE', 10))
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=host_pools, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide shared session"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def retry_after_seconds(value):
+    """
+    Read a Retry-After header, given as delay-seconds or an HTTP date
+    Returns: seconds to wait (0 for dates already past), or None if unreadable
+    """
+    value = value.strip()
+    if value.isdecimal() and len(value) <= 9:
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, response=None):
+    """Seconds to wait before retry number attempt (starting at 0)"""
+    if response is not None:
+        retry_after = retry_after_seconds(response.headers.get('Retry-After') or '')
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX)
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    # Full jitter keeps concurrent workers from retrying in lockstep
+    return random.uniform(0, delay)
+
+
+def fetch(url, headers=None, timeout=None, retries=None, session=None, rate_limit=True):
+    """
+    GET a URL through the shared session, retrying connection errors and
+    retryable statuses. The last response is returned even if it failed,
+    so callers can still call raise_for_status() on it.
+    """
+    session = session or get_session()
+    timeout = timeout or DEFAULT_TIMEOUT
+    retries = DEFAULT_RETRIES if retries is None else retries
+    limiter = get_rate_limiter() if rate_limit else None
+
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.acquire(url)
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Fetching {url} failed ({e}), retrying in {delay:.1f}s")
+        else:
+            if limiter:
+                if response.status_code in THROTTLE_STATUSES:
+                    limiter.penalize(url)
+                elif response.status_code < 400:
+                    limiter.reward(url)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            delay = backoff_delay(attempt, response)
+            logger.warning(f"{url} returned {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
@@ -1,8 +1,7 @@
-import requests
-from bs4 import BeautifulSoup
-import time
 import random
 import logging
+from html_parsing import make_soup
+from http_session import fetch
 
 class JioMartReviewScraper:
     def __init__(self):
@@ -21,10 +20,9 @@ class JioMartReviewScraper:
         headers = self.get_random_header()
 
         try:
-            time.sleep(random.uniform(2, 5))
-            response = requests.get(url, headers=headers)
+            response = fetch(url, headers=headers)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content, 'jiomart')
 
             review_elements = soup.find_all('div', class_='review-card')
 
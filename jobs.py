@@ -0,0 +1,286 @@
+"""
+In-process job queue for long-running analysis work.
+A bounded queue feeds a fixed set of worker threads; submitting to a full
+queue fails immediately so the web tier can push back instead of blocking.
+
+Jobs run in the process that accepted them, but their status and results
+are also written to a SQLite file (JOB_STATE_DB) so that any gunicorn worker
+on the host can answer a status poll or render the results. Setting
+JOB_STATE_DB to an empty string keeps job state in memory only, which is
+only correct with a single worker process. The owning process renews a
+heartbeat on its unfinished jobs; a pending or running job whose heartbeat
+is older than JOB_LEASE seconds belonged to a process that died, and is
+marked failed when read.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import threading
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has reached its maximum depth"""
+
+
+class Job:
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, func, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.status = Job.PENDING
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @classmethod
+    def restore(cls, row):
+        """Rebuild a job saved by another process; it cannot be run again here"""
+        job = cls(None, None, None)
+        (job.id, job.status, job.error, job.created_at, job.started_at, job.finished_at, result) = row
+        job.result = json.loads(result) if result is not None else None
+        return job
+
+    def to_dict(self):
+        """
+        Public view of the job, without its result payload
+        Returns: dict with id, status, error and timings
+        """
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    def __init__(self, workers=None, max_depth=None, result_ttl=None, db_path=None, lease=None):
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        self.workers = workers or int(os.environ.get('JOB_WORKERS', 2))
+        self.max_depth = max_depth or int(os.environ.get('JOB_QUEUE_DEPTH', 20))
+        self.result_ttl = result_ttl or float(os.environ.get('JOB_RESULT_TTL', 3600))
+        self.db_path = os.environ.get('JOB_STATE_DB', 'jobs.sqlite3') if db_path is None else db_path
+        self.lease = lease or float(os.environ.get('JOB_LEASE', 60))
+
+        self._queue = queue.Queue(maxsize=self.max_depth)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._local = threading.local()
+
+        if self.db_path:
+            with self._connection() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        error TEXT,
+                        created_at REAL NOT NULL,
+                        started_at REAL,
+                        finished_at REAL,
+                        result TEXT,
+                        heartbeat_at REAL
+                    )
+                """)
+                try:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+                except sqlite3.OperationalError:
+                    pass  # Already there
+
+    # --- Shared state (SQLite) ---
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _save(self, job):
+        """Publish the job's state to the other worker processes"""
+        if not self.db_path:
+            return
+        try:
+            result = json.dumps(job.result, default=str) if job.result is not None else None
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs (id, status, error, created_at, started_at, finished_at, result, "
+                    "heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.id, job.status, job.error, job.created_at, job.started_at, job.finished_at, result, time.time())
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not save state of job {job.id}: {e}")
+
+    def _delete(self, job_id):
+        if not self.db_path:
+            return
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not delete state of job {job_id}: {e}")
+
+    def _load(self, job_id):
+        try:
+            row = self._connection().execute(
+                "SELECT id, status, error, created_at, started_at, finished_at, result, heartbeat_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not read state of job {job_id}: {e}")
+            return None
+        if not row:
+            return None
+        job = Job.restore(row[:7])
+        heartbeat_at = row[7] or job.created_at
+        if job.status in (Job.PENDING, Job.RUNNING) and heartbeat_at < time.time() - self.lease:
+            if not self._fail_abandoned(job, heartbeat_at):
+                # Its owner renewed the lease or finished it meanwhile
+                return self._load(job_id)
+        return job
+
+    def _fail_abandoned(self, job, heartbeat_at):
+        """
+        Mark a job whose owning process stopped renewing its heartbeat as failed
+        Returns: False if the saved job changed since it was read
+        """
+        job.status = Job.FAILED
+        job.error = 'The worker process running this job stopped'
+        job.finished_at = time.time()
+        try:
+            with self._connection() as conn:
+                # Only if the heartbeat is still the stale one we read
+                updated = conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE id = ? AND status IN (?, ?) AND IFNULL(heartbeat_at, created_at) = ?",
+                    (job.status, job.error, job.finished_at, job.id, Job.PENDING, Job.RUNNING, heartbeat_at)
+                ).rowcount
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not fail job {job.id}: {e}")
+            return True
+        if updated:
+            self.logger.warning(f"Job {job.id} lost its worker process; marked it failed.")
+        return bool(updated)
+
+    def _heartbeat(self):
+        """Renew the lease on this process's unfinished jobs"""
+        while True:
+            time.sleep(self.lease / 4)
+            with self._lock:
+                job_ids = [job.id for job in self._jobs.values() if job.finished_at is None]
+            if not job_ids:
+                continue
+            try:
+                with self._connection() as conn:
+                    now = time.time()
+                    conn.executemany("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND finished_at IS NULL",
+                                     ((now, job_id) for job_id in job_ids))
+            except sqlite3.Error as e:
+                self.logger.warning(f"Could not renew job heartbeats: {e}")
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.db_path:
+                thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Enqueue func(*args, **kwargs) for a worker thread
+        Returns: the new Job
+        Raises: QueueFull when the queue is at max depth
+        """
+        self.start()
+        self._expire()
+
+        job = Job(func, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+        # Saved before a worker can pick it up, so this write never lands after theirs
+        self._save(job)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            self._delete(job.id)
+            raise QueueFull(f"Job queue is full ({self.max_depth} jobs waiting)")
+
+        self.logger.info(f"Queued job {job.id} ({self._queue.qsize()} waiting)")
+        return job
+
+    def get(self, job_id):
+        """
+        Look up a job submitted to this process or, failing that, to any other
+        Returns: Job, or None if it is unknown or has expired
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.db_path:
+            job = self._load(job_id)
+        return job
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = Job.RUNNING
+            job.started_at = time.time()
+            self._save(job)
+            try:
+                job.result = job.func(*job.args, **job.kwargs)
+                job.status = Job.DONE
+            except Exception as e:
+                self.logger.error(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = Job.FAILED
+            finally:
+                job.finished_at = time.time()
+                # Drop references to the inputs once the job has run
+                job.args = job.kwargs = None
+                self._save(job)
+                self._queue.task_done()
+
+    def _expire(self):
+        """Forget finished jobs older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.db_path:
+            try:
+                with self._connection() as conn:
+                    conn.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+            except sqlite3.Error as e:
+                self.logger.warning(f"Could not expire saved jobs: {e}")
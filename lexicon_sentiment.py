@@ -0,0 +1,363 @@
+"""
+Fast, exact re-implementation of TextBlob's PatternAnalyzer for batches.
+PatternAnalyzer re-runs pattern's tokenizer regexes on every text, looks
+every word up through a lazily-loading dict subclass and builds a new
+namedtuple class per call. This scorer keeps the same algorithm but:
+
+- precompiles the lexicon once into a plain dict of word -> (polarity,
+  subjectivity, intensity, is_modifier);
+- memoizes how each whitespace-separated chunk splits into tokens, which
+  is a pure function of the chunk and repeats heavily across reviews;
+- skips building sentences and running the sarcasm and emoticon
+  substitutions unless a face typed with spaces (": )") could be joined,
+  which in most reviews it cannot;
+- classifies each distinct word once and keeps the running assessment
+  in locals rather than a list of tuples;
+- scores a whole batch in one call.
+
+Scores are identical to PatternAnalyzer().analyze(text) (same operations in
+the same order, so the floats match bit for bit).
+"""
+
+import re
+from itertools import product
+
+# Token splits and word classifications are memoized for this many distinct strings
+TOKEN_CACHE_SIZE = 200000
+
+# Tokens that end a sentence, and the tokens that may trail it (pattern's find_tokens)
+SENTENCE_END = frozenset(("...", ".", "!", "?", "END-OF-SENTENCE"))
+SENTENCE_RUN = frozenset(("'", "\"", "”", "’", "...", ".", "!", "?", ")", "END-OF-SENTENCE"))
+# pattern counts quotes in a sentence it has not filled yet, so quotes always stop the run
+SENTENCE_RUN_ON = SENTENCE_RUN - {"'", "\""}
+
+
+def _join_emoticon(match):
+    return match.group(1).replace(" ", "") + match.group(2)
+
+
+def _sentence_may_break(face):
+    """Whether some split of face into tokens has a sentence break inside it, as "o . O" does"""
+    for cuts in product((False, True), repeat=len(face) - 1):
+        tokens, token = [], face[0]
+        for cut, char in zip(cuts, face[1:]):
+            if cut:
+                tokens.append(token)
+                token = char
+            else:
+                token += char
+        tokens.append(token)
+        if any(token in SENTENCE_RUN_ON and following not in SENTENCE_RUN_ON
+               for token, following in zip(tokens, tokens[1:])):
+            return True
+    return False
+
+
+class _Memo(dict):
+    """Dict that fills itself from func on first lookup of a key"""
+
+    def __init__(self, func):
+        super().__init__()
+        self._func = func
+
+    def __missing__(self, key):
+        value = self[key] = self._func(key)
+        return value
+
+
+class LexiconScorer:
+    def __init__(self, sentiment):
+        # textblob's _text module holds the tokenizer constants pattern uses
+        from textblob import _text
+
+        self._punctuation_string = _text.PUNCTUATION
+        self._punctuation = tuple(_text.PUNCTUATION.replace(".", ""))
+        self._trailing = self._punctuation + (".",)
+        self._abbreviations = _text.ABBREVIATIONS
+        self._abbr_patterns = (_text.RE_ABBR1, _text.RE_ABBR2, _text.RE_ABBR3)
+        self._replacements = list(_text.replacements.items())
+        # Texts without this skip the contractions; "" (always in) if one lacks an apostrophe
+        self._contraction_mark = "'" if all("'" in old for old in _text.replacements) else ""
+        self._contractions = _text.replacements
+        self._eos = _text.EOS
+        self._re_sarcasm = _text.RE_SARCASM
+        self._re_emoticons = _text.RE_EMOTICONS
+        self._re_linebreak = re.compile(r"\n{2,}")
+
+        # Lowercased emoticon -> polarity, first match in EMOTICONS order wins as in pattern
+        self._emoticons = {}
+        for (_, polarity), faces in _text.EMOTICONS.items():
+            for face in faces:
+                self._emoticons.setdefault(face.lower(), polarity)
+
+        # The sarcasm and emoticon substitutions only change text where a match spans
+        # tokens; its last token is then the end of a face ("(!)" included) and the
+        # token before it ends with the character before that. Token -> those characters,
+        # lowercased so lowered text can be checked (folding only adds candidates).
+        faces = [face for faces in _text.EMOTICONS.values() for face in faces] + ["(!)"]
+        self._face_ends = {}
+        for face in faces:
+            for i in range(1, len(face)):
+                self._face_ends.setdefault(face[i:].lower(), set()).add(face[i - 1].lower())
+        self._face_end_set = frozenset(self._face_ends)
+        # Ends of the faces a sentence break can cut; only texts with one of these
+        # need the substitutions run sentence by sentence
+        self._cut_face_ends = frozenset(
+            face[i:].lower() for face in faces if _sentence_may_break(face) for i in range(1, len(face)))
+
+        self.negations = tuple(sentiment.negations)
+        self.modifiers = tuple(sentiment.modifiers)
+        self.modifier = sentiment.modifier
+        if dict.__len__(sentiment) == 0:
+            sentiment.load()
+        self.lexicon = {}
+        for word, senses in dict.items(sentiment):
+            if None in senses:
+                polarity, subjectivity, intensity = senses[None]
+                is_modifier = any(tag in senses for tag in self.modifiers)
+                self.lexicon[word] = (polarity, subjectivity, intensity, is_modifier)
+
+        self._chunks = _Memo(self._split_chunk)
+        # Chunks with a face end that may join the token before it
+        self._face_chunks = set()
+        self._kinds = {}
+
+    @classmethod
+    def from_textblob(cls):
+        """Scorer over the lexicon TextBlob's PatternAnalyzer uses"""
+        from textblob.en import sentiment
+        return cls(sentiment)
+
+    # --- Tokenizer (pattern's find_tokens) ---
+
+    def _split_chunk(self, chunk):
+        t = chunk
+        if t[0] not in self._punctuation_string and t[-1] not in self._punctuation_string:
+            # A single token, which may still join the chunk before
+            if t.lower() in self._face_ends:
+                self._face_chunks.add(chunk)
+            return t
+        punctuation = self._punctuation
+        tokens = []
+        tail = []
+        while t.startswith(punctuation) and t not in self._contractions:
+            tokens.append(t[0]); t = t[1:]
+        while t.endswith(self._trailing) and t not in self._contractions:
+            if t.endswith(punctuation):
+                tail.append(t[-1]); t = t[:-1]
+            if t.endswith("..."):
+                tail.append("..."); t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if t in self._abbreviations or any(pattern.match(t) is not None for pattern in self._abbr_patterns):
+                    break
+                tail.append(t[-1]); t = t[:-1]
+        if t != "":
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+        self._note_face_end(chunk, tokens)
+        # Space-joined, so a text's tokens join in one call
+        return " ".join(tokens)
+
+    def _note_face_end(self, chunk, tokens):
+        """Remember chunks holding a face end that could join the token before it"""
+        face_ends = self._face_ends
+        words = [token.lower() for token in tokens if token != self._eos]
+        for i, word in enumerate(words):
+            if word in face_ends and (i == 0 or words[i - 1][-1] in face_ends[word]):
+                self._face_chunks.add(chunk)
+                return
+
+    def tokenize(self, string):
+        """
+        Same tokens as pattern's find_tokens, flattened and lowercased the way
+        Sentiment.__call__ reads them
+        Returns: list of words
+        """
+        if self._contraction_mark in string:
+            for old, new in self._replacements:
+                string = string.replace(old, new)
+        string = string.replace("“", " “ ").replace("”", " ” ").replace("‘", " ‘ ")\
+                       .replace("’", " ’ ").replace("'", " ' ").replace('"', ' " ')
+        string = string.replace("\r\n", "\n")
+        if "\n\n" in string:
+            string = self._re_linebreak.sub(f" {self._eos} ", string)
+
+        chunks = self._chunks
+        if len(chunks) > TOKEN_CACHE_SIZE:
+            chunks.clear()
+            self._face_chunks.clear()
+        parts = string.split()
+        text = " ".join(map(chunks.__getitem__, parts))
+
+        eos = self._eos
+        lowered = text.lower()
+        if eos in string:
+            lowered = " ".join(token.lower() for token in text.split() if token != eos)
+        words = lowered.split()
+        if self._face_chunks.isdisjoint(parts) or not self._may_join_face(lowered, words):
+            # Nothing for the substitutions to rewrite, so sentences need not be built
+            return words
+
+        if eos not in string and self._cut_face_ends.isdisjoint(words):
+            # No face that a sentence break could cut is here, so one pass over the whole
+            # text rewrites the same spans as one pass per sentence
+            return self._join_faces(text).lower().split()
+
+        tokens = text.split()
+
+        # Sentence boundaries only need checking where a sentence-ending token sits
+        bounds, resume, count = [0], 0, len(tokens)
+        for j in [k for k, token in enumerate(tokens) if token in SENTENCE_END]:
+            if j < resume:
+                continue
+            while j < count and tokens[j] in SENTENCE_RUN_ON:
+                j += 1
+            bounds.append(j)
+            resume = j + 1
+        bounds.append(count)
+        sentences = [tokens[i:j] for i, j in zip(bounds, bounds[1:])]
+        if eos in string:
+            sentences = [[token for token in sentence if token != eos] for sentence in sentences]
+
+        # pattern runs these per sentence; no match can span a newline, so one pass over
+        # newline-joined sentences matches the same spans
+        text = "\n".join(" ".join(sentence) for sentence in sentences if sentence)
+        return self._join_faces(text).lower().split()
+
+    def _join_faces(self, text):
+        """pattern's sarcasm and emoticon substitutions"""
+        if "(" in text:
+            text = self._re_sarcasm.sub("(!)", text)
+        return self._re_emoticons.sub(_join_emoticon, text)
+
+    def _may_join_face(self, text, words):
+        """Whether the sarcasm or emoticon substitution could join any of the words (space-joined in text)"""
+        face_ends = self._face_ends
+        ends = self._face_end_set.intersection(words)
+        if not ends:
+            return False
+        text = f" {text} "
+        for end in ends:
+            needle = f" {end} "
+            k = text.find(needle, 1)
+            while k != -1:
+                if text[k - 1] in face_ends[end]:
+                    return True
+                k = text.find(needle, k + 1)
+        return False
+
+    # --- Scoring (pattern's Sentiment.assessments) ---
+
+    def _classify(self, w):
+        """
+        Everything assessments() asks about a word, computed once per distinct word:
+        (tag, polarity, subjectivity, intensity, is_modifier, is_negation) for lexicon
+        words, tagged 3, or 2 if they are neither modifiers nor negations, and
+        (tag, is_negation, ends_negation, ends_modifier, special) for the rest, tagged
+        1, or 0 if they are neither negations nor specials
+        """
+        entry = self.lexicon.get(w)
+        is_negation = w in self.negations
+        if entry is not None:
+            return (3 if entry[3] or is_negation else 2,) + entry + (is_negation,)
+        if w == "!" or w == "(!)":
+            special = w
+        elif w.isalpha() is False and len(w) <= 5 and w not in self._punctuation_string:
+            special = self._emoticons.get(w)
+        else:
+            special = None
+        return (1 if is_negation or special is not None else 0, is_negation, len(w.strip("'")) > 1, len(w) > 2, special)
+
+    def assessments(self, words):
+        """
+        (polarity, subjectivity) of each assessed chunk, as in pattern. Only the
+        latest chunk is ever changed, so it is kept in locals (polarity, subjectivity,
+        intensity, negated) and appended once the next one starts.
+        Returns: list of (polarity, subjectivity) pairs
+        """
+        kinds = self._kinds
+        if len(kinds) > TOKEN_CACHE_SIZE:
+            kinds.clear()
+        a = []
+        last = False
+        lp = ls = li = 0.0
+        negated = False
+        m = None
+        n = None
+        for w in words:
+            try:
+                kind = kinds[w]
+            except KeyError:
+                kind = kinds[w] = self._classify(w)
+            tag = kind[0]
+            if m is None and n is None:
+                # Most words: nothing pending for them to change or end
+                if tag == 0:
+                    continue
+                if tag == 2:
+                    if last:
+                        a.append((lp * -0.5 if negated else lp, ls))
+                    last = True
+                    lp, ls, li, negated = kind[1], kind[2], kind[3], False
+                    continue
+            if tag >= 2:
+                _, p, s, i, is_modifier, is_negation = kind
+                if m is None:
+                    if last:
+                        a.append((lp * -0.5 if negated else lp, ls))
+                    last = True
+                    lp, ls, li, negated = p, s, i, False
+                else:
+                    # Conditional clamps give the same floats as max(-1.0, min(x, +1.0))
+                    p *= li
+                    s *= li
+                    lp = +1.0 if p > +1.0 else -1.0 if p < -1.0 else p
+                    ls = +1.0 if s > +1.0 else -1.0 if s < -1.0 else s
+                    li = i
+                if n is not None:
+                    li = 1.0 / li
+                    negated = True
+                m = w if is_modifier else None
+                n = w if is_negation else None
+            else:
+                _, is_negation, ends_negation, ends_modifier, special = kind
+                if is_negation:
+                    n = w
+                elif n and ends_negation:
+                    n = None
+                if n is not None and m is not None and self.modifier(m):
+                    negated = True
+                    n = None
+                elif m and ends_modifier:
+                    m = None
+                if special is not None:
+                    if special == "!":
+                        if last:
+                            lp *= 1.25
+                            lp = +1.0 if lp > +1.0 else -1.0 if lp < -1.0 else lp
+                    else:
+                        if last:
+                            a.append((lp * -0.5 if negated else lp, ls))
+                        last = True
+                        lp, ls, li, negated = (0.0 if special == "(!)" else special), 1.0, 1.0, False
+        if last:
+            a.append((lp * -0.5 if negated else lp, ls))
+        return a
+
+    def score(self, text):
+        """
+        Score one text
+        Returns: (polarity, subjectivity) exactly as PatternAnalyzer returns them
+        """
+        a = self.assessments(self.tokenize(text))
+        polarity = subjectivity = 0
+        for p, s in a:
+            polarity += p
+            subjectivity += s
+        count = float(len(a) or 1)
+        return polarity / count, subjectivity / count
+
+    def score_many(self, texts):
+        """Score a batch; returns a list of (polarity, subjectivity) pairs"""
+        score = self.score
+        return [score(text) for text in texts]
@@ -0,0 +1,145 @@
+"""
+Lightweight in-process metrics in the Prometheus text format.
+Counters and latency histograms live in module-level registries and are
+rendered by the /metrics endpoint. With METRICS_ENABLED=0 every recording
+call returns immediately and timers are a shared no-op context manager, so
+instrumented code pays almost nothing.
+
+Each process keeps its own numbers; with several gunicorn workers, each
+scrape of /metrics reports the worker that served it.
+"""
+
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+PREFIX = 'review_analyzer'
+
+# Seconds; covers everything from a cache hit to a slow headless page load
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_NULL_TIMER = nullcontext()
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = f'{PREFIX}_{name}'
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = f'{PREFIX}_{name}'
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the duration of its block"""
+        if not ENABLED:
+            return _NULL_TIMER
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._values.get(tuple(labels.get(name, '') for name in self.labelnames))
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            all_series = {key: list(series) for key, series in self._values.items()}
+        for key, series in sorted(all_series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+def render():
+    """
+    Every registered metric in the Prometheus text exposition format
+    Returns: str
+    """
+    return '\n'.join(line for metric in _registry for line in metric.render()) + '\n'
+
+
+def reset():
+    """Drop all recorded values (for benchmarks and tests)"""
+    for metric in _registry:
+        with metric._lock:
+            metric._values.clear()
+
+
+# --- Application metrics ---
+
+STAGE_SECONDS = Histogram(
+    'stage_seconds', 'Time spent in each stage of scraping, analysis and charting', labelnames=('stage',))
+REVIEWS_SCRAPED = Counter('reviews_scraped_total', 'Reviews returned by scrapes', labelnames=('retailer',))
+PAGES_FETCHED = Counter('pages_fetched_total', 'Review pages served by each fetch tier', labelnames=('tier',))
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'Cache lookups by cache and outcome', labelnames=('cache', 'result'))
+CAPTCHA_DETECTIONS = Counter('captcha_detections_total', 'Pages answered with a CAPTCHA', labelnames=('retailer',))
+DRIVER_CRASHES = Counter('driver_crashes_total', 'Chrome drivers found unresponsive', labelnames=('phase',))
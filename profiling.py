@@ -0,0 +1,253 @@
+"""
+Opt-in, rate-limited profiling of single requests.
+A profile session runs cProfile in every thread attached to it (the job
+thread plus the page-fetch threads it fans out to) and samples their stacks
+on a timer. When the session ends it writes, keyed by request id:
+
+    <PROFILE_DIR>/<request_id>.pstats     merged cProfile stats (python -m pstats, snakeviz)
+    <PROFILE_DIR>/<request_id>.collapsed  sampled stacks for flamegraph.pl / speedscope
+    <PROFILE_DIR>/<request_id>.json       wall time and self time per component
+
+PROFILING=off ignores every trigger, opt-in (the default) profiles requests
+that ask for it with an X-Profile: 1 header or profile=1 parameter (or
+batch --profile), and always profiles every request. Either way at most
+PROFILE_MAX_PER_MINUTE sessions start per process, so it can stay on in
+production.
+
+From Python 3.12 cProfile is process-wide and only one can be enabled at a
+time. A thread that cannot start its own cProfile (a fan-out thread, or a
+second concurrent session) is still sampled, and a session with no cProfile
+data attributes time from its samples instead.
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+
+PROFILE_MODE = os.environ.get('PROFILING', 'opt-in')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_MAX_PER_MINUTE = int(os.environ.get('PROFILE_MAX_PER_MINUTE', 2))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005))
+
+# Path fragments that identify the frames we want time attributed to
+COMPONENTS = (
+    ('SmartScraper', ('smart_scraper.py',)),
+    ('BeautifulSoup', (f'{os.sep}bs4{os.sep}', 'html_parsing.py', f'{os.sep}lxml{os.sep}')),
+    ('TextBlob', (f'{os.sep}textblob{os.sep}', f'{os.sep}nltk{os.sep}', 'sentiment.py')),
+    ('matplotlib', (f'{os.sep}matplotlib{os.sep}', 'charts.py')),
+    ('Selenium', (f'{os.sep}selenium{os.sep}', 'driver_pool.py')),
+    ('HTTP', (f'{os.sep}requests{os.sep}', f'{os.sep}urllib3{os.sep}', 'http_session.py')),
+    ('imports', ('<frozen importlib',)),
+    ('waiting', (f'{os.sep}threading.py', f'{os.sep}concurrent{os.sep}futures{os.sep}', f'{os.sep}queue.py')),
+)
+
+logger = logging.getLogger(__name__)
+_active = threading.local()
+
+
+def component_of(filename):
+    for component, fragments in COMPONENTS:
+        if any(fragment in filename for fragment in fragments):
+            return component
+    return 'other'
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    def __init__(self, request_id, label='', output_dir=PROFILE_DIR, interval=PROFILE_SAMPLE_INTERVAL):
+        self.request_id = request_id
+        self.label = label
+        self.output_dir = output_dir
+        self.interval = interval
+        self._profiles = []
+        self._threads = set()
+        self._stacks = Counter()
+        self._leaf_components = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._started = None
+
+    @contextmanager
+    def attach(self):
+        """Profile the current thread for the duration of the with-block"""
+        profile = cProfile.Profile()
+        ident = threading.get_ident()
+        _active.session = self
+        with self._lock:
+            self._threads.add(ident)
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Python 3.12+: another cProfile is already active in this process
+            logger.debug(f"Profile {self.request_id}: sampling thread {ident} only ({e})")
+            profile = None
+        try:
+            yield self
+        finally:
+            if profile is not None:
+                profile.disable()
+            with self._lock:
+                self._threads.discard(ident)
+                if profile is not None:
+                    self._profiles.append(profile)
+            _active.session = None
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self._stacks[';'.join(reversed(stack))] += 1
+                    self._leaf_components[component_of(frames[ident].f_code.co_filename)] += 1
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+        self._attachment = self.attach()
+        return self._attachment.__enter__()
+
+    def __exit__(self, *exc):
+        self._attachment.__exit__(*exc)
+        self._stopped.set()
+        self._sampler.join()
+        try:
+            self.save(time.perf_counter() - self._started)
+        except Exception as e:
+            logger.warning(f"Could not save profile {self.request_id}: {e}")
+
+    def attribution(self, stats):
+        """
+        Self time per component from merged cProfile stats. Built-in functions
+        have no file, so their time goes to the component of whoever called them.
+        Returns: dict of component -> seconds, largest first
+        """
+        totals = {}
+        for (filename, _, _), (_, _, tottime, _, callers) in stats.stats.items():
+            if filename == '~' and callers:
+                shares = [(component_of(caller[0]), caller_stats[2]) for caller, caller_stats in callers.items()]
+            else:
+                shares = [(component_of(filename), tottime)]
+            for component, seconds in shares:
+                totals[component] = totals.get(component, 0.0) + seconds
+        return {component: round(seconds, 4) for component, seconds in sorted(totals.items(), key=lambda item: -item[1])}
+
+    def sampled_attribution(self):
+        """
+        Self time per component estimated from the sampled stacks' leaf frames
+        Returns: dict of component -> seconds, largest first
+        """
+        return {component: round(count * self.interval, 4) for component, count in self._leaf_components.most_common()}
+
+    def save(self, wall_seconds):
+        """Write pstats (when any thread ran cProfile), collapsed stacks and a JSON summary; returns the base path"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.request_id)
+
+        stats = pstats.Stats(*self._profiles) if self._profiles else None
+        if stats is not None:
+            stats.dump_stats(f'{base}.pstats')
+        with open(f'{base}.collapsed', 'w') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+        top = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:25] if stats is not None else []
+        summary = {
+            'request_id': self.request_id,
+            'label': self.label,
+            'wall_seconds': round(wall_seconds, 4),
+            'threads_profiled': len(self._profiles),
+            'samples': sum(self._stacks.values()),
+            'self_seconds_by_component': self.attribution(stats) if stats is not None else self.sampled_attribution(),
+            'top_cumulative': [
+                {'function': f'{name} ({os.path.basename(filename)}:{line})', 'calls': calls, 'cumulative_seconds': round(cumtime, 4)}
+                for (filename, line, name), (_, calls, _, cumtime, _) in top
+            ]
+        }
+        with open(f'{base}.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(f"Saved profile {self.request_id} ({self.label}, {wall_seconds:.2f}s): {summary['self_seconds_by_component']}")
+        return base
+
+
+class Profiler:
+    def __init__(self, mode=None, max_per_minute=None, output_dir=None):
+        self.mode = mode or PROFILE_MODE
+        self.max_per_minute = PROFILE_MAX_PER_MINUTE if max_per_minute is None else max_per_minute
+        self.output_dir = output_dir or PROFILE_DIR
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def should_profile(self, requested=False):
+        """
+        Decide whether to profile a request, taking a rate-limit slot if so
+        Returns: bool
+        """
+        if self.mode == 'off' or (self.mode != 'always' and not requested):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_per_minute:
+                logger.info("Profiling skipped: rate limit reached.")
+                return False
+            self._recent.append(now)
+            return True
+
+    def session(self, request_id, label=''):
+        return ProfileSession(request_id, label, output_dir=self.output_dir)
+
+    def wrap(self, func, request_id, label=''):
+        """Return func wrapped so that it runs inside a profile session"""
+        def profiled(*args, **kwargs):
+            with self.session(request_id, label):
+                return func(*args, **kwargs)
+        return profiled
+
+
+def active_session():
+    """The profile session attached to the current thread, if any"""
+    return getattr(_active, 'session', None)
+
+
+def attached(session):
+    """
+    Attach the current thread to session (e.g. from a worker thread the
+    profiled request fans out to); a no-op when session is None
+    """
+    if session is None or active_session() is not None:
+        return nullcontext()
+    return session.attach()
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """Process-wide profiler; returns the shared Profiler"""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler()
+    return _profiler
@@ -0,0 +1,126 @@
+"""
+Adaptive per-domain rate limiting for outbound scraping traffic.
+Each domain has a token bucket, so a domain that has been idle is fetched
+immediately and only bursts are slowed down. The refill rate backs off when a
+retailer answers with 429 or a CAPTCHA and recovers gradually on success.
+
+Buckets live in memory and are shared by every thread in the process. When
+RATE_LIMIT_STATE_DIR is set they are kept in small lock-protected files
+instead, so all gunicorn workers on the host draw from the same buckets.
+"""
+
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+def domain_of(url):
+    """Bucket key for a URL or bare host"""
+    host = (urlparse(url).netloc or url).lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+class RateLimiter:
+    def __init__(self, rate=None, burst=None, min_rate=None, state_dir=None):
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        # Requests per second per domain, and how many may go back to back
+        self.max_rate = rate or float(os.environ.get('RATE_LIMIT_RATE', 0.5))
+        self.burst = burst or float(os.environ.get('RATE_LIMIT_BURST', 3))
+        self.min_rate = min_rate or float(os.environ.get('RATE_LIMIT_MIN_RATE', 0.05))
+        # Additive increase per successful request, as a fraction of max_rate
+        self.recovery = 0.1 * self.max_rate
+        self.state_dir = state_dir or os.environ.get('RATE_LIMIT_STATE_DIR') or None
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+        if self.state_dir:
+            os.makedirs(self.state_dir, exist_ok=True)
+
+    def _new_bucket(self):
+        return {'tokens': self.burst, 'last': time.time(), 'rate': self.max_rate}
+
+    @contextmanager
+    def _bucket(self, domain):
+        """Yield the domain's bucket dict under the appropriate lock; changes are saved on exit"""
+        with self._lock:
+            if not self.state_dir:
+                bucket = self._buckets.setdefault(domain, self._new_bucket())
+                yield bucket
+                return
+
+            path = os.path.join(self.state_dir, f"{domain}.json")
+            with open(path, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    content = f.read()
+                    bucket = json.loads(content) if content else self._new_bucket()
+                    yield bucket
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(bucket))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, bucket, now):
+        elapsed = max(0.0, now - bucket['last'])
+        bucket['tokens'] = min(self.burst, bucket['tokens'] + elapsed * bucket['rate'])
+        bucket['last'] = now
+
+    def acquire(self, url):
+        """
+        Take one token for the URL's domain, sleeping only if the bucket is empty
+        Returns: seconds spent waiting
+        """
+        domain = domain_of(url)
+        with self._bucket(domain) as bucket:
+            self._refill(bucket, time.time())
+            # Reserve the token now; a negative balance is the queue of waiters
+            bucket['tokens'] -= 1
+            delay = -bucket['tokens'] / bucket['rate'] if bucket['tokens'] < 0 else 0.0
+
+        if delay > 0:
+            self.logger.info(f"Rate limiting {domain}: waiting {delay:.2f}s")
+            time.sleep(delay)
+        return delay
+
+    def penalize(self, url):
+        """Halve the domain's rate after a 429 or CAPTCHA"""
+        domain = domain_of(url)
+        with self._bucket(domain) as bucket:
+            bucket['rate'] = max(self.min_rate, bucket['rate'] / 2)
+            bucket['tokens'] = min(bucket['tokens'], 0.0)
+            rate = bucket['rate']
+        self.logger.warning(f"Backing off {domain} to {rate:.3f} requests/s")
+
+    def reward(self, url):
+        """Recover the domain's rate a little after a successful request"""
+        with self._bucket(domain_of(url)) as bucket:
+            if bucket['rate'] < self.max_rate:
+                bucket['rate'] = min(self.max_rate, bucket['rate'] + self.recovery)
+
+    def rate(self, url):
+        with self._bucket(domain_of(url)) as bucket:
+            return bucket['rate']
+
+
+_limiter_lock = threading.Lock()
+_limiter = None
+
+
+def get_rate_limiter():
+    """Return the process-wide limiter"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
@@ -13,3 +13,6 @@ apt-get install -y google-chrome-stable
 # Install Python dependencies
 pip install --upgrade pip
 pip install -r requirements.txt
+
+# Pre-bake chromedriver so workers never download it at request time
+python driver_resolver.py
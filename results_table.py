@@ -0,0 +1,194 @@
+"""
+Compact columnar container for analyzed reviews.
+Instead of one six-key dict per review, scores are stored as float32 arrays,
+sentiment as a uint8 code, ratings as int8, review text in one shared string
+buffer and authors dictionary-encoded. Aggregations run as NumPy operations
+over the columns; row() and to_dicts() give dict views for templates.
+"""
+
+from array import array
+
+import numpy as np
+
+from aggregators import SentimentStats
+
+SENTIMENT_LABELS = ('Positive', 'Negative', 'Neutral')
+SENTIMENT_CODES = {label: code for code, label in enumerate(SENTIMENT_LABELS)}
+NEUTRAL = SENTIMENT_CODES['Neutral']
+NO_RATING = -1
+
+
+def parse_rating(rating):
+    """Scraped ratings arrive as '4', '4.0', 4 or 'N/A'; returns a small int or NO_RATING"""
+    try:
+        value = int(float(rating))
+    except (TypeError, ValueError):
+        return NO_RATING
+    return value if 0 <= value <= 127 else NO_RATING
+
+
+class ReviewTable:
+    def __init__(self, polarity, subjectivity, sentiment, rating, text_buffer, text_offsets, author_codes, authors):
+        self.polarity = polarity
+        self.subjectivity = subjectivity
+        self.sentiment = sentiment
+        self.rating = rating
+        self._text_buffer = text_buffer
+        self._text_offsets = text_offsets
+        self._author_codes = author_codes
+        self._authors = authors
+
+    @classmethod
+    def from_reviews(cls, analyzed_reviews):
+        """
+        Build a table from an iterable of analyzed review dicts in one pass
+        Returns: ReviewTable
+        """
+        polarity = array('f')
+        subjectivity = array('f')
+        sentiment = array('B')
+        rating = array('b')
+        offsets = array('q', [0])
+        texts = []
+        author_codes = array('I')
+        authors = {}
+
+        for review in analyzed_reviews:
+            polarity.append(review['polarity'])
+            subjectivity.append(review['subjectivity'])
+            sentiment.append(SENTIMENT_CODES.get(review.get('sentiment'), NEUTRAL))
+            rating.append(parse_rating(review.get('rating')))
+            text = review.get('text') or ''
+            texts.append(text)
+            offsets.append(offsets[-1] + len(text))
+            author_codes.append(authors.setdefault(review.get('author', 'Anonymous'), len(authors)))
+
+        return cls(
+            polarity=np.frombuffer(polarity, dtype=np.float32),
+            subjectivity=np.frombuffer(subjectivity, dtype=np.float32),
+            sentiment=np.frombuffer(sentiment, dtype=np.uint8),
+            rating=np.frombuffer(rating, dtype=np.int8),
+            text_buffer=''.join(texts),
+            text_offsets=np.frombuffer(offsets, dtype=np.int64),
+            author_codes=np.frombuffer(author_codes, dtype=np.uint32),
+            authors=list(authors)
+        )
+
+    def __len__(self):
+        return len(self.sentiment)
+
+    def text(self, i):
+        return self._text_buffer[self._text_offsets[i]:self._text_offsets[i + 1]]
+
+    def row(self, i):
+        """Dict view of one review, shaped like analyze_reviews output"""
+        rating = int(self.rating[i])
+        return {
+            'text': self.text(i),
+            'author': self._authors[self._author_codes[i]],
+            'rating': rating if rating != NO_RATING else 'N/A',
+            # Scores were rounded to 3 places before storage, so this recovers them exactly
+            'polarity': round(float(self.polarity[i]), 3),
+            'subjectivity': round(float(self.subjectivity[i]), 3),
+            'sentiment': SENTIMENT_LABELS[self.sentiment[i]]
+        }
+
+    def rows(self, indices=None):
+        """Yield dict views for the given indices (all rows by default)"""
+        for i in (range(len(self)) if indices is None else indices):
+            yield self.row(int(i))
+
+    def to_dicts(self, limit=None):
+        return list(self.rows(range(min(len(self), limit if limit is not None else len(self)))))
+
+    def __iter__(self):
+        return self.rows()
+
+    def nbytes(self):
+        """Approximate memory held by the columns"""
+        return (self.polarity.nbytes + self.subjectivity.nbytes + self.sentiment.nbytes + self.rating.nbytes
+                + self._text_offsets.nbytes + self._author_codes.nbytes + len(self._text_buffer.encode('utf-8')))
+
+    # --- Vectorized aggregations ---
+
+    def sentiment_counts(self):
+        """Same result and key order as SentimentAnalyzer.get_sentiment_counts"""
+        totals = np.bincount(self.sentiment, minlength=len(SENTIMENT_LABELS))
+        present = [code for code in range(len(SENTIMENT_LABELS)) if totals[code]]
+        # Labels appear in order of first occurrence, then the missing ones
+        present.sort(key=lambda code: int(np.argmax(self.sentiment == code)))
+        counts = {SENTIMENT_LABELS[code]: int(totals[code]) for code in present}
+        for label in SENTIMENT_LABELS:
+            counts.setdefault(label, 0)
+        return counts
+
+    def group_by_sentiment(self, max_per_group=5):
+        return {
+            label: list(self.rows(np.flatnonzero(self.sentiment == code)[:max_per_group]))
+            for label, code in SENTIMENT_CODES.items()
+        }
+
+    def stats(self):
+        """
+        Fill a mergeable SentimentStats accumulator from the columns
+        Returns: SentimentStats
+        """
+        stats = SentimentStats()
+        if not len(self):
+            return stats
+
+        # np.round recovers the exact 3-decimal doubles the dict path would hold,
+        # and the builtin sum adds them in the same order
+        polarity = np.round(self.polarity.astype(np.float64), 3)
+        subjectivity = np.round(self.subjectivity.astype(np.float64), 3)
+        stats.count = len(self)
+        stats.total_polarity = sum(polarity.tolist())
+        stats.total_subjectivity = sum(subjectivity.tolist())
+        stats.sq_polarity = float(np.dot(polarity, polarity))
+        stats.sq_subjectivity = float(np.dot(subjectivity, subjectivity))
+        stats.counts.counts = {label: n for label, n in self.sentiment_counts().items() if n}
+        stats.polarity_histogram = np.bincount(
+            np.rint(polarity * SentimentStats.RESOLUTION).astype(np.intp) + SentimentStats.RESOLUTION,
+            minlength=SentimentStats.POLARITY_BINS).tolist()
+        stats.subjectivity_histogram = np.bincount(
+            np.rint(subjectivity * SentimentStats.RESOLUTION).astype(np.intp),
+            minlength=SentimentStats.SUBJECTIVITY_BINS).tolist()
+        return stats
+
+    def statistics(self):
+        return self.stats().result()
+
+    def top_positive_negative(self, top_n=3):
+        """
+        The top_n highest and lowest polarity rows via np.partition, in O(n).
+        Ties are broken exactly as a stable sort would: later rows first among
+        the positives, earlier rows first among the negatives.
+        """
+        total = len(self)
+        if top_n <= 0 or not total:
+            # Degenerate slices keep whatever sorted()[-top_n:] would have returned
+            order = np.argsort(self.polarity, kind='stable')
+            return {
+                'top_positive': list(self.rows(order[-top_n:][::-1])),
+                'top_negative': list(self.rows(order[:top_n]))
+            }
+
+        k = min(top_n, total)
+        polarity = self.polarity
+
+        cutoff = np.partition(polarity, total - k)[total - k]
+        above = np.flatnonzero(polarity > cutoff)
+        ties = np.flatnonzero(polarity == cutoff)
+        positive = np.concatenate([above, ties[len(ties) - (k - len(above)):]])
+        positive = positive[np.lexsort((positive, polarity[positive]))[::-1]]
+
+        cutoff = np.partition(polarity, k - 1)[k - 1]
+        below = np.flatnonzero(polarity < cutoff)
+        ties = np.flatnonzero(polarity == cutoff)
+        negative = np.concatenate([below, ties[:k - len(below)]])
+        negative = negative[np.lexsort((negative, polarity[negative]))]
+
+        return {
+            'top_positive': list(self.rows(positive)),
+            'top_negative': list(self.rows(negative))
+        }
@@ -0,0 +1,195 @@
+"""
+Retailer detection and product URL canonicalization.
+Two URLs for the same product (tracking parameters, mobile hosts, SEO
+slugs) canonicalize to the same string so they can share cached results.
+"""
+
+import re
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+RETAILERS = ('amazon', 'flipkart', 'myntra', 'jiomart')
+
+# CSS selector for one review container on each retailer's pages
+REVIEW_SELECTORS = {
+    'amazon': "div[data-hook='review']",
+    'flipkart': "div._27M-vq",
+    'myntra': "div.user-review-userReviewWrapper",
+    'jiomart': "div.review-card"
+}
+
+# (tag, attrs) of the review container, used to parse only the review subtrees
+REVIEW_CONTAINERS = {
+    'amazon': ('div', {'data-hook': 'review'}),
+    'flipkart': ('div', {'class': '_27M-vq'}),
+    'myntra': ('div', {'class': 'user-review-userReviewWrapper'}),
+    'jiomart': ('div', {'class': 'review-card'})
+}
+
+# Field selectors inside a review container, for in-browser extraction.
+# Each field is read like BeautifulSoup's get_text(strip=True); 'value' is a constant
+# and 'first_word' keeps only the text before the first space.
+REVIEW_FIELDS = {
+    'amazon': {
+        'text': {'selector': "span[data-hook='review-body']"},
+        'author': {'selector': "span.a-profile-name"},
+        'rating': {'selector': "i[data-hook='review-star-rating']", 'first_word': True}
+    },
+    'flipkart': {
+        'text': {'selector': "div.t-ZTKy"},
+        'author': {'selector': "p._2sc7ZR"},
+        'rating': {'selector': "div._3LWZlK"}
+    },
+    'myntra': {
+        'text': {'selector': "div.user-review-reviewText"},
+        'author': {'value': 'Myntra Customer'},
+        'rating': {'selector': "div.user-review-ratings div"}
+    },
+    'jiomart': {
+        'text': {'selector': "div.review-text p"},
+        'author': {'selector': "div.reviewer-name"},
+        'rating': {'selector': "span.rating-star"}
+    }
+}
+
+# Requests the headless browser drops before they leave it (CDP URL patterns).
+# Reviews never need images, media, fonts or third-party ad and analytics scripts.
+BLOCKED_RESOURCES = [
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3'
+]
+BLOCKED_DOMAINS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*criteo.*', '*hotjar.com*', '*clarity.ms*',
+    '*branch.io*', '*adservice.google.*', '*scorecardresearch.com*'
+]
+BLOCKING_PROFILES = {
+    'amazon': BLOCKED_RESOURCES + BLOCKED_DOMAINS + ['*amazon-adsystem.com*', '*fls-*.amazon.*', '*unagi*.amazon.*'],
+    'flipkart': BLOCKED_RESOURCES + BLOCKED_DOMAINS + ['*rukminim*.flixcart.com*', '*1.rome.api.flipkart.com/api/*/fdp*'],
+    'myntra': BLOCKED_RESOURCES + BLOCKED_DOMAINS + ['*assets.myntassets.com/*/image*'],
+    'jiomart': BLOCKED_RESOURCES + BLOCKED_DOMAINS + ['*jiomart.com/images/*']
+}
+
+# Retailers with numbered review pages; the rest load more reviews on scroll
+PAGINATED_RETAILERS = ('amazon', 'flipkart')
+
+# Reviews on one numbered review page; scraped reviews are analyzed in chunks
+# of this size so scoring keeps pace with page loads
+REVIEWS_PER_PAGE = 10
+
+# Retailers whose review markup is usually server-rendered and worth a plain HTTP fetch first
+HTTP_FIRST_RETAILERS = ('amazon', 'flipkart', 'jiomart')
+
+# Lowercased markers of each retailer's bot-check page. Product pages mention
+# captcha in login scripts, so only text unique to the block pages counts.
+CAPTCHA_MARKERS = {
+    'amazon': ('/errors/validatecaptcha', 'enter the characters you see below', '<title dir="ltr">robot check</title>'),
+    'flipkart': ('are you a human?', 'flipkart.com/captcha'),
+    'myntra': ('<title>access denied</title>', 'errors.edgesuite.net'),
+    'jiomart': ('<title>access denied</title>', 'errors.edgesuite.net')
+}
+# Block pages are small and put their markers up front; real pages run to megabytes
+CAPTCHA_SCAN_CHARS = 65536
+
+# Query parameters that only track the visit and never change the page
+TRACKING_PARAMS = {
+    'ref', 'ref_', 'tag', 'psc', 'smid', 'th', 'qid', 'sr', 'keywords', 'crid', 'sprefix',
+    'content-id', 'linkcode', 'linkid', 'camp', 'creative', 'creativeasin', 'ascsubtag',
+    'otracker', 'otracker1', 'lid', 'marketplace', 'store', 'srno', 'iid', 'ssid', 'ppt', 'ppn',
+    'fm', 'affid', 'spotlighttagid', 'gclid', 'fbclid', 'msclkid', 'src', 'source', 'cmpid'
+}
+TRACKING_PREFIXES = ('utm_', 'pf_rd_', 'pd_rd_', 'affextparam', '_encoding')
+
+FLIPKART_ITEM_PATTERN = re.compile(r'/(?:p|product-reviews)/(itm[0-9a-z]+)(?:[/?]|$)', re.IGNORECASE)
+ASIN_PATTERN = re.compile(r'/(?:dp|gp/product|gp/aw/d|product-reviews)/([A-Z0-9]{10})(?:[/?]|$)', re.IGNORECASE)
+
+
+def detect_retailer(url):
+    """Return the retailer name contained in the URL, or None"""
+    return next((name for name in RETAILERS if name in url), None)
+
+
+def is_bot_check(page, retailer):
+    """True if the page is the retailer's CAPTCHA or bot block page rather than the product"""
+    head = page[:CAPTCHA_SCAN_CHARS].lower()
+    return any(marker in head for marker in CAPTCHA_MARKERS.get(retailer, ()))
+
+
+def extract_asin(url):
+    """Return the Amazon ASIN from a product or review URL, or None"""
+    match = ASIN_PATTERN.search(urlparse(url).path + '/')
+    return match.group(1).upper() if match else None
+
+
+def extract_flipkart_pid(url):
+    """Return Flipkart's pid query parameter, or None"""
+    return dict(parse_qsl(urlparse(url).query)).get('pid')
+
+
+def _is_tracking(param):
+    param = param.lower()
+    return param in TRACKING_PARAMS or param.startswith(TRACKING_PREFIXES)
+
+
+def _bare_host(netloc):
+    host = netloc.lower().split(':')[0]
+    for prefix in ('www.', 'm.', 'dl.'):
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def canonicalize_url(url):
+    """
+    Reduce a product URL to a canonical form
+    Returns: canonical URL string
+    """
+    parsed = urlparse(url.strip())
+    host = 'www.' + _bare_host(parsed.netloc)
+    retailer = detect_retailer(host)
+
+    if retailer == 'amazon':
+        asin = extract_asin(url)
+        if asin:
+            return f"https://{host}/dp/{asin}"
+
+    if retailer == 'flipkart':
+        # The pid names the product; the SEO slug and /p/ vs /product-reviews/ do not
+        pid = extract_flipkart_pid(url)
+        if pid:
+            item = FLIPKART_ITEM_PATTERN.search(parsed.path)
+            path = f"/p/{item.group(1).lower()}" if item else '/p'
+            return f"https://{host}{path}?{urlencode({'pid': pid})}"
+
+    params = sorted((key, value) for key, value in parse_qsl(parsed.query) if not _is_tracking(key))
+    return urlunparse(('https', host, parsed.path.rstrip('/') or '/', '', urlencode(params), ''))
+
+
+def review_page_url(url, page, newest_first=False):
+    """
+    Build the URL of a numbered review page for a product (pages start at 1).
+    newest_first asks the retailer to sort reviews by date instead of relevance.
+    Returns: page URL, or None if the product has no numbered review pages
+    """
+    parsed = urlparse(url.strip())
+    host = 'www.' + _bare_host(parsed.netloc)
+    retailer = detect_retailer(host)
+
+    if retailer == 'amazon':
+        asin = extract_asin(url)
+        if asin:
+            params = {'pageNumber': page}
+            if newest_first:
+                params['sortBy'] = 'recent'
+            return f"https://{host}/product-reviews/{asin}/?{urlencode(params)}"
+
+    if retailer == 'flipkart':
+        pid = extract_flipkart_pid(url)
+        path = parsed.path.replace('/p/', '/product-reviews/', 1)
+        if pid and '/product-reviews/' in path:
+            params = {'pid': pid, 'page': page}
+            if newest_first:
+                params['sortOrder'] = 'MOST_RECENT'
+            return f"https://{host}{path.rstrip('/')}?{urlencode(params)}"
+
+    return None
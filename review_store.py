@@ -0,0 +1,263 @@
+"""
+Persistent store of products, reviews and their sentiment scores.
+Reviews are keyed by a stable hash of retailer, product, author and
+normalized text, so scraping the same review again never duplicates it.
+update_product() re-scrapes newest-first and, where review pages are
+numbered and sorted by date, stops at the first review the store already
+holds, then analyzes only the new reviews; concurrent updates of one product
+share a single scrape. Results pages and exports read everything back from
+the store.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from retailers import detect_retailer, canonicalize_url, review_page_url
+from scrape_cache import Flight
+from results_table import SENTIMENT_LABELS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    retailer TEXT NOT NULL,
+    canonical_url TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    last_scraped REAL
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    review_hash TEXT NOT NULL UNIQUE,
+    author TEXT,
+    text TEXT NOT NULL,
+    rating,
+    polarity REAL NOT NULL,
+    subjectivity REAL NOT NULL,
+    sentiment TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_product ON reviews (product_id, id);
+CREATE INDEX IF NOT EXISTS reviews_by_sentiment ON reviews (product_id, sentiment, id);
+CREATE INDEX IF NOT EXISTS reviews_by_polarity ON reviews (product_id, polarity);
+"""
+
+REVIEW_COLUMNS = ('text', 'author', 'rating', 'polarity', 'subjectivity', 'sentiment')
+
+
+def review_hash(retailer, canonical_url, review):
+    """Stable identity of a review within a product; any whitespace change is the same review"""
+    text = ' '.join((review.get('text') or '').split())
+    payload = '\0'.join((retailer or '', canonical_url, review.get('author') or '', text))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ReviewStore:
+    def __init__(self, db_path='reviews.sqlite3'):
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        self.db_path = db_path
+        self._local = threading.local()
+        self._updates = {}
+        self._updates_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        """A store at REVIEW_STORE_DB, or None when it is set to an empty string"""
+        db_path = os.environ.get('REVIEW_STORE_DB', 'reviews.sqlite3')
+        return cls(db_path) if db_path else None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # --- Products ---
+
+    def get_product(self, url):
+        """
+        Look up a product by any of its URLs
+        Returns: dict with id, retailer, canonical_url and last_scraped, or None
+        """
+        row = self._connection().execute(
+            "SELECT id, retailer, canonical_url, last_scraped FROM products WHERE canonical_url = ?",
+            (canonicalize_url(url),)
+        ).fetchone()
+        return dict(zip(('id', 'retailer', 'canonical_url', 'last_scraped'), row)) if row else None
+
+    def ensure_product(self, url):
+        """
+        Create the product row if needed
+        Returns: product dict as from get_product
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO products (retailer, canonical_url, created_at) VALUES (?, ?, ?)",
+                (detect_retailer(url), canonicalize_url(url), time.time())
+            )
+        return self.get_product(url)
+
+    def mark_scraped(self, product_id, when=None):
+        with self._connection() as conn:
+            conn.execute("UPDATE products SET last_scraped = ? WHERE id = ?", (when or time.time(), product_id))
+
+    # --- Reviews ---
+
+    def has_review(self, review_hash):
+        return self._connection().execute(
+            "SELECT 1 FROM reviews WHERE review_hash = ?", (review_hash,)
+        ).fetchone() is not None
+
+    def add_reviews(self, product_id, hashes, analyzed_reviews):
+        """
+        Insert analyzed reviews under their review hashes; ones already stored are skipped
+        Returns: number of reviews inserted
+        """
+        now = time.time()
+        with self._connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO reviews (product_id, review_hash, author, text, rating, polarity, subjectivity, "
+                "sentiment, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((product_id, digest, review.get('author'), review['text'], review.get('rating'),
+                  review['polarity'], review['subjectivity'], review['sentiment'], now)
+                 for digest, review in zip(hashes, analyzed_reviews))
+            )
+            return conn.total_changes - before
+
+    def iter_reviews(self, product_id, sentiment=None, limit=None, batch_size=1000):
+        """
+        Stream a product's reviews in the order they were stored, optionally
+        filtered by sentiment, without loading them all at once
+        Returns: generator of review dicts shaped like analyze_reviews output
+        """
+        query = f"SELECT {', '.join(REVIEW_COLUMNS)} FROM reviews WHERE product_id = ?"
+        params = [product_id]
+        if sentiment:
+            query += " AND sentiment = ?"
+            params.append(sentiment)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        cursor = self._connection().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(zip(REVIEW_COLUMNS, row))
+        finally:
+            cursor.close()
+
+    def sentiment_counts(self, product_id):
+        """
+        Reviews per sentiment, computed in SQL
+        Returns: dict with all three sentiment labels
+        """
+        rows = self._connection().execute(
+            "SELECT sentiment, COUNT(*) FROM reviews WHERE product_id = ? GROUP BY sentiment", (product_id,)
+        )
+        counts = dict.fromkeys(SENTIMENT_LABELS, 0)
+        counts.update(rows)
+        return counts
+
+    def group_reviews_by_sentiment(self, product_id, max_per_group=5):
+        """
+        The first max_per_group stored reviews of each sentiment
+        Returns: dict with sentiment categories as keys
+        """
+        return {label: list(self.iter_reviews(product_id, sentiment=label, limit=max_per_group))
+                for label in SENTIMENT_LABELS}
+
+    def review_count(self, product_id):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM reviews WHERE product_id = ?", (product_id,)
+        ).fetchone()[0]
+
+
+def update_product(store, scraper, analyzer, url, max_reviews=100, refresh_after=None):
+    """
+    Bring a product's stored reviews up to date. Products scraped within
+    refresh_after seconds are not scraped again. Otherwise review pages are
+    read newest-first until a review the store already has shows up, and only
+    the new reviews are analyzed and stored. Callers arriving while the same
+    product is being updated wait for that update instead of scraping again.
+    Reviews come from scraper.stream_reviews, so a scrape the scraper's cache
+    still holds is reused; a stale one is used while the cache refreshes it,
+    and the refreshed reviews are picked up by the next update.
+    Returns: (product dict, number of new reviews)
+    """
+    if refresh_after is None:
+        refresh_after = float(os.environ.get('REVIEW_STORE_REFRESH', 1800))
+
+    product = store.ensure_product(url)
+    if product['last_scraped'] and time.time() - product['last_scraped'] < refresh_after:
+        return product, 0
+
+    key = product['canonical_url']
+    with store._updates_lock:
+        flight = store._updates.get(key)
+        leader = flight is None
+        if leader:
+            flight = store._updates[key] = Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return store.get_product(url), 0
+
+    try:
+        flight.result = _scrape_new_reviews(store, scraper, analyzer, url, product, max_reviews)
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with store._updates_lock:
+            store._updates.pop(key, None)
+        flight.done.set()
+    return flight.result
+
+
+def _scrape_new_reviews(store, scraper, analyzer, url, product, max_reviews):
+    stored = store.review_count(product['id'])
+    # Only numbered review pages come back sorted by date; a scrolling page's
+    # order says nothing about which reviews are new
+    incremental = stored > 0 and review_page_url(url, 1) is not None
+    new_reviews = {}
+    # Through the scrape cache, so its TTL, stale serving and single-flight still apply
+    reviews = scraper.stream_reviews(url, max_reviews, newest_first=True)
+    try:
+        for review in reviews:
+            digest = review_hash(product['retailer'], product['canonical_url'], review)
+            if digest in new_reviews:
+                continue
+            if store.has_review(digest):
+                if incremental:
+                    # Everything past this point was stored by an earlier scrape
+                    break
+                continue
+            new_reviews[digest] = review
+    finally:
+        reviews.close()  # Cancels review pages still loading; a run stopped early is not cached
+
+    added = store.add_reviews(product['id'], new_reviews, analyzer.analyze_reviews_table(new_reviews.values())) if new_reviews else 0
+    # An empty scrape of a new product is most likely a block; leave it due for another try
+    if new_reviews or stored:
+        store.mark_scraped(product['id'])
+    store.logger.info(f"Stored {added} new reviews for {product['canonical_url']}"
+                      f"{' (incremental)' if incremental else ''}.")
+    return store.get_product(url), added
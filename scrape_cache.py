@@ -0,0 +1,185 @@
+"""
+Product-level cache for scrape results.
+Fresh entries are served directly; entries past their TTL but inside the
+stale window are served while a background thread refreshes them. Concurrent
+misses for the same key share a single scrape (single-flight). stream()
+passes a scrape's items through as they arrive and caches the finished list.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_LOOKUPS
+
+DEFAULT_TTLS = {
+    'amazon': 1800,
+    'flipkart': 1800,
+    'myntra': 3600,
+    'jiomart': 3600
+}
+
+
+class Flight:
+    """One in-progress fetch that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ScrapeCache:
+    def __init__(self, ttls=None, stale_window=None, max_entries=None):
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        self.ttls = dict(DEFAULT_TTLS)
+        for retailer in self.ttls:
+            override = os.environ.get(f'SCRAPE_CACHE_TTL_{retailer.upper()}')
+            if override:
+                self.ttls[retailer] = float(override)
+        self.ttls.update(ttls or {})
+        self.default_ttl = float(os.environ.get('SCRAPE_CACHE_TTL', 1800))
+        self.stale_window = stale_window if stale_window is not None else float(os.environ.get('SCRAPE_CACHE_STALE', 6 * 3600))
+        self.max_entries = max_entries or int(os.environ.get('SCRAPE_CACHE_SIZE', 500))
+
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'refreshes': 0}
+
+    def get_or_fetch(self, key, retailer, fetch):
+        """
+        Return the cached result for key, calling fetch() when it is missing.
+        Empty results are never cached so a failed scrape is retried next time.
+        """
+        cached, flight, leader = self._lookup(key, retailer, fetch)
+        if cached is not None:
+            return cached
+
+        if leader:
+            self._run_flight(key, fetch)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        if flight.result is None:
+            # Coalesced onto a stream() the caller stopped early; fetch for ourselves
+            return self.get_or_fetch(key, retailer, fetch)
+        return list(flight.result)
+
+    def stream(self, key, retailer, iterate):
+        """
+        Like get_or_fetch for a fetch that produces items one at a time. On a
+        miss, items from iterate() are yielded as they arrive and the complete
+        list is cached afterwards; a run the caller stops early is not cached.
+        Callers coalesced onto a running fetch get its list once it finishes.
+        Returns: generator of items
+        """
+        cached, flight, leader = self._lookup(key, retailer, lambda: list(iterate()))
+        if cached is not None:
+            yield from cached
+            return
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.result is None:
+                # The leader stopped early, so there is no complete result to share
+                yield from self.stream(key, retailer, iterate)
+                return
+            yield from flight.result
+            return
+
+        collected = []
+        try:
+            for item in iterate():
+                collected.append(item)
+                yield item
+            flight.result = collected
+            if collected:
+                self._store(key, collected)
+        except Exception as e:
+            self.logger.error(f"Scrape for {key} failed: {e}")
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _lookup(self, key, retailer, fetch):
+        """
+        Serve key from the cache or join or start its flight; a stale hit starts
+        a background refresh with fetch
+        Returns: (cached list or None, flight, True if the caller must run the flight)
+        """
+        ttl = self.ttls.get(retailer, self.default_ttl)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                age = now - stored_at
+                if age < ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    CACHE_LOOKUPS.inc(cache='scrape', result='hit')
+                    return list(result), None, False
+                if age < ttl + self.stale_window:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    CACHE_LOOKUPS.inc(cache='scrape', result='stale_hit')
+                    if key not in self._flights:
+                        self._flights[key] = Flight()
+                        self._stats['refreshes'] += 1
+                        threading.Thread(target=self._run_flight, args=(key, fetch), daemon=True).start()
+                    return list(result), None, False
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats['coalesced'] += 1
+                CACHE_LOOKUPS.inc(cache='scrape', result='coalesced')
+                return None, flight, False
+            flight = self._flights[key] = Flight()
+            self._stats['misses'] += 1
+            CACHE_LOOKUPS.inc(cache='scrape', result='miss')
+            return None, flight, True
+
+    def _run_flight(self, key, fetch):
+        with self._lock:
+            flight = self._flights[key]
+        try:
+            flight.result = fetch() or []
+            if flight.result:
+                self._store(key, flight.result)
+        except Exception as e:
+            self.logger.error(f"Scrape for {key} failed: {e}")
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.time(), list(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -3,12 +3,11 @@ Web scraper module for extracting product reviews from allowed domains.
 Uses BeautifulSoup4 and requests for web scraping with ethical practices.
 """
 
-import requests
-from bs4 import BeautifulSoup
-import time
 import random
 from urllib.parse import urlparse, urljoin
 import logging
+from http_session import fetch
+from html_parsing import make_soup
 
 class ReviewScraper:
     def __init__(self):
@@ -52,7 +51,7 @@ class ReviewScraper:
         """Check robots.txt for scraping guidelines"""
         try:
             robots_url = urljoin(base_url, '/robots.txt')
-            response = requests.get(robots_url, headers=self.headers, timeout=10)
+            response = fetch(robots_url, headers=self.headers)
             if response.status_code == 200:
                 self.logger.info(f"Found robots.txt at {robots_url}")
                 return response.text
@@ -87,13 +86,11 @@ class ReviewScraper:
         """Scrape quotes from quotes.toscrape.com as demo reviews"""
         reviews = []
         try:
-            # Add delay to be respectful
-            time.sleep(random.uniform(1, 2))
-
-            response = requests.get(url, headers=self.headers, timeout=10)
+            # fetch() rate-limits per domain to stay respectful
+            response = fetch(url, headers=self.headers)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
             quotes = soup.find_all('div', class_='quote')
 
             for quote in quotes[:max_reviews]:
@@ -123,12 +120,10 @@ class ReviewScraper:
         """Scrape book titles from books.toscrape.com as demo reviews"""
         reviews = []
         try:
-            time.sleep(random.uniform(1, 2))
-
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = fetch(url, headers=self.headers)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
             books = soup.find_all('article', class_='product_pod')
 
             for book in books[:max_reviews]:
@@ -165,13 +160,12 @@ class ReviewScraper:
     def _scrape_generic_demo(self, url, max_reviews):
         """Generic scraper for demo purposes"""
         try:
-            time.sleep(random.uniform(1, 2))
-
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = fetch(url, headers=self.headers)
             response.raise_for_status()
 
             # Try to find any text content for demo purposes
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # (html.parser keeps the text layout identical across installs)
+            soup = make_soup(response.content, backend='html.parser')
 
             # Remove script and style elements
             for script in soup(["script", "style"]):
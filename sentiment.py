@@ -3,12 +3,34 @@ Sentiment analysis module using TextBlob for product review analysis.
 Processes reviews and categorizes them into Positive, Negative, and Neutral sentiments.
 """
 
-from textblob import TextBlob
+from sentiment_cache import SentimentCache
+from aggregators import consume, SentimentCounts, SentimentGroups, SentimentStats, TopReviews
+from results_table import ReviewTable
+from metrics import STAGE_SECONDS
+from exports import iter_csv
+import os
 import logging
-from collections import defaultdict
+import threading
+import multiprocessing
+from itertools import islice
+from importlib.metadata import version
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when scoring changes so cached results are not reused
+ANALYZER_VERSION = 2
+
+_worker_scorer = None
+
+def _score_texts(texts):
+    """Score a chunk of texts in a worker process; returns (polarity, subjectivity) pairs"""
+    global _worker_scorer
+    if _worker_scorer is None:
+        from lexicon_sentiment import LexiconScorer
+        _worker_scorer = LexiconScorer.from_textblob()
+    return _worker_scorer.score_many(texts)
 
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, cache=None):
         # Configure logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
@@ -17,15 +39,43 @@ class SentimentAnalyzer:
         self.positive_threshold = 0.1
         self.negative_threshold = -0.1
 
+        # Batch scoring: an exact re-implementation of TextBlob's PatternAnalyzer
+        # over a precompiled lexicon. TextBlob is imported on first use, not at startup.
+        self._scorer = None
+        self.process_threshold = int(os.environ.get('SENTIMENT_PROCESS_THRESHOLD', 5000))
+        self.processes = int(os.environ.get('SENTIMENT_PROCESSES', os.cpu_count() or 1))
+        self.chunk_size = int(os.environ.get('SENTIMENT_CHUNK_SIZE', 1000))
+        # One long-lived pool; forkserver/spawn because workers fork from a threaded server
+        self.process_start_method = os.environ.get('SENTIMENT_PROCESS_START', 'forkserver')
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Reviews pulled from the input per batch when streaming
+        self.stream_chunk_size = int(os.environ.get('SENTIMENT_STREAM_CHUNK', 10000))
+
+        # Results cache, namespaced by everything that affects a score
+        namespace = f"v{ANALYZER_VERSION}:textblob-{version('textblob')}:{self.positive_threshold}:{self.negative_threshold}"
+        self.cache = cache or SentimentCache.from_env(namespace=namespace)
+
+    @property
+    def scorer(self):
+        if self._scorer is None:
+            from lexicon_sentiment import LexiconScorer
+            self._scorer = LexiconScorer.from_textblob()
+        return self._scorer
+
     def analyze_sentiment(self, text):
         """
         Analyze sentiment of a single text using TextBlob
         Returns: dict with polarity, subjectivity, and sentiment label
         """
         try:
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
+            key = self.cache.key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+            from textblob import TextBlob
+            polarity, subjectivity = TextBlob(text).sentiment
 
             # Determine sentiment label
             if polarity > self.positive_threshold:
@@ -35,11 +85,13 @@ class SentimentAnalyzer:
             else:
                 sentiment = 'Neutral'
 
-            return {
+            result = {
                 'polarity': round(polarity, 3),
                 'subjectivity': round(subjectivity, 3),
                 'sentiment': sentiment
             }
+            self.cache.set(key, result)
+            return result
 
         except Exception as e:
             self.logger.error(f"Error analyzing sentiment: {e}")
@@ -49,161 +101,185 @@ class SentimentAnalyzer:
                 'sentiment': 'Neutral'
             }
 
-    def analyze_reviews(self, reviews):
+    def analyze_batch(self, texts):
         """
-        Analyze sentiment for a list of reviews
-        Returns: list of reviews with added sentiment analysis
+        Analyze sentiment for many texts at once. Each distinct text is scored
+        a single time, cached results are reused and large batches are spread
+        over a process pool.
+        Returns: list of dicts matching analyze_sentiment, in input order
         """
-        analyzed_reviews = []
-
-        for review in reviews:
-            try:
-                # Get original review data
-                review_text = review.get('text', '')
-                author = review.get('author', 'Anonymous')
-                rating = review.get('rating', 3)
-
-                # Perform sentiment analysis
-                sentiment_data = self.analyze_sentiment(review_text)
+        with STAGE_SECONDS.time(stage='sentiment_batch'):
+            return self._analyze_batch(list(texts))
+
+    def _analyze_batch(self, texts):
+        keys = {text: self.cache.key(text) for text in texts if isinstance(text, str)}
+        cached = self.cache.get_many(list(set(keys.values())))
+
+        pending = {}
+        for text, key in keys.items():
+            if key not in cached:
+                pending.setdefault(key, text)
+        unique = list(pending.values())
+        scores = self._score_unique(unique)
+
+        results = {}
+        for text, (pol, subj) in zip(unique, scores):
+            # Same comparisons as analyze_sentiment
+            if pol > self.positive_threshold:
+                sentiment = 'Positive'
+            elif pol < self.negative_threshold:
+                sentiment = 'Negative'
+            else:
+                sentiment = 'Neutral'
+            results[keys[text]] = {
+                'polarity': round(pol, 3),
+                'subjectivity': round(subj, 3),
+                'sentiment': sentiment
+            }
+        self.cache.set_many(results)
+        results.update(cached)
 
-                # Combine original review with sentiment analysis
-                analyzed_review = {
-                    'text': review_text,
-                    'author': author,
-                    'rating': rating,
-                    'polarity': sentiment_data['polarity'],
-                    'subjectivity': sentiment_data['subjectivity'],
-                    'sentiment': sentiment_data['sentiment']
-                }
+        # Anything TextBlob could not take falls back to analyze_sentiment
+        return [dict(results[keys[text]]) if isinstance(text, str) else self.analyze_sentiment(text)
+                for text in texts]
 
-                analyzed_reviews.append(analyzed_review)
+    def _score_unique(self, texts):
+        """Return (polarity, subjectivity) for each text"""
+        if len(texts) < self.process_threshold or self.processes < 2:
+            return self.scorer.score_many(texts)
 
-            except Exception as e:
-                self.logger.error(f"Error processing review: {e}")
-                continue
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        try:
+            return [score for chunk in self.process_pool().map(_score_texts, chunks) for score in chunk]
+        except Exception as e:
+            self.logger.warning(f"Process pool scoring failed, scoring in-process: {e}")
+            self.close()
+            return self.scorer.score_many(texts)
+
+    def process_pool(self):
+        """The analyzer's scoring pool, started on first use and reused after"""
+        with self._pool_lock:
+            if self._pool is None:
+                context = multiprocessing.get_context(self.process_start_method)
+                self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+            return self._pool
+
+    def close(self):
+        """Shut the scoring pool down; it is started again if needed"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def iter_analyze(self, reviews, chunk_size=None):
+        """
+        Lazily analyze an iterable of reviews, scoring chunk_size at a time
+        Returns: generator of analyzed review dicts
+        """
+        chunk_size = chunk_size or self.stream_chunk_size
+        reviews = iter(reviews)
+        while True:
+            pulled = list(islice(reviews, chunk_size))
+            if not pulled:
+                break
+
+            chunk = []
+            for review in pulled:
+                try:
+                    # Get original review data
+                    chunk.append({
+                        'text': review.get('text', ''),
+                        'author': review.get('author', 'Anonymous'),
+                        'rating': review.get('rating', 3)
+                    })
+                except Exception as e:
+                    self.logger.error(f"Error processing review: {e}")
+                    continue
+
+            # Score the chunk in one batch and merge the results back in
+            sentiments = self.analyze_batch(review['text'] for review in chunk)
+            for analyzed_review, sentiment_data in zip(chunk, sentiments):
+                analyzed_review.update(sentiment_data)
+                yield analyzed_review
 
-        self.logger.info(f"Analyzed {len(analyzed_reviews)} reviews")
+    def analyze_reviews(self, reviews):
+        """
+        Analyze sentiment for a list of reviews
+        Returns: list of reviews with added sentiment analysis
+        """
+        with STAGE_SECONDS.time(stage='analyze_reviews'):
+            analyzed_reviews = list(self.iter_analyze(reviews))
+        self.logger.info(f"Analyzed {len(analyzed_reviews)} reviews (cache: {self.cache.stats()})")
         return analyzed_reviews
 
+    def analyze_reviews_table(self, reviews, chunk_size=None):
+        """
+        Analyze reviews into a compact columnar ReviewTable instead of a list of dicts,
+        scoring chunk_size at a time as the iterable yields them
+        Returns: ReviewTable
+        """
+        table = ReviewTable.from_reviews(self.iter_analyze(reviews, chunk_size))
+        self.logger.info(f"Analyzed {len(table)} reviews into {table.nbytes()} bytes (cache: {self.cache.stats()})")
+        return table
+
     def get_sentiment_counts(self, analyzed_reviews):
         """
         Count reviews by sentiment category
         Returns: dict with sentiment counts
         """
-        sentiment_counts = defaultdict(int)
-
-        for review in analyzed_reviews:
-            sentiment = review.get('sentiment', 'Neutral')
-            sentiment_counts[sentiment] += 1
-
-        # Ensure all three categories are present
-        for sentiment in ['Positive', 'Negative', 'Neutral']:
-            if sentiment not in sentiment_counts:
-                sentiment_counts[sentiment] = 0
-
-        return dict(sentiment_counts)
+        if isinstance(analyzed_reviews, ReviewTable):
+            return analyzed_reviews.sentiment_counts()
+        counts, = consume(analyzed_reviews, SentimentCounts())
+        return counts.result()
 
     def group_reviews_by_sentiment(self, analyzed_reviews, max_per_group=5):
         """
         Group reviews by sentiment for display
         Returns: dict with sentiment categories as keys
         """
-        grouped = {
-            'Positive': [],
-            'Negative': [],
-            'Neutral': []
-        }
-
-        for review in analyzed_reviews:
-            sentiment = review.get('sentiment', 'Neutral')
-            if len(grouped[sentiment]) < max_per_group:
-                grouped[sentiment].append(review)
-
-        return grouped
+        if isinstance(analyzed_reviews, ReviewTable):
+            return analyzed_reviews.group_by_sentiment(max_per_group)
+        groups, = consume(analyzed_reviews, SentimentGroups(max_per_group))
+        return groups.result()
 
     def get_sentiment_statistics(self, analyzed_reviews):
         """
         Calculate detailed sentiment statistics
         Returns: dict with comprehensive statistics
         """
-        if not analyzed_reviews:
-            return {
-                'total_reviews': 0,
-                'avg_polarity': 0.0,
-                'avg_subjectivity': 0.0,
-                'sentiment_distribution': {'Positive': 0, 'Negative': 0, 'Neutral': 0},
-                'sentiment_percentages': {'Positive': 0.0, 'Negative': 0.0, 'Neutral': 0.0}
-            }
-
-        total_reviews = len(analyzed_reviews)
-        total_polarity = sum(review['polarity'] for review in analyzed_reviews)
-        total_subjectivity = sum(review['subjectivity'] for review in analyzed_reviews)
-
-        avg_polarity = total_polarity / total_reviews
-        avg_subjectivity = total_subjectivity / total_reviews
-
-        # Get sentiment distribution
-        sentiment_counts = self.get_sentiment_counts(analyzed_reviews)
-
-        # Calculate percentages
-        sentiment_percentages = {}
-        for sentiment, count in sentiment_counts.items():
-            sentiment_percentages[sentiment] = round((count / total_reviews) * 100, 1)
-
-        return {
-            'total_reviews': total_reviews,
-            'avg_polarity': round(avg_polarity, 3),
-            'avg_subjectivity': round(avg_subjectivity, 3),
-            'sentiment_distribution': sentiment_counts,
-            'sentiment_percentages': sentiment_percentages
-        }
+        if isinstance(analyzed_reviews, ReviewTable):
+            return analyzed_reviews.statistics()
+        stats, = consume(analyzed_reviews, SentimentStats())
+        return stats.result()
 
     def get_top_positive_negative(self, analyzed_reviews, top_n=3):
         """
         Get top positive and negative reviews based on polarity score
         Returns: dict with top positive and negative reviews
         """
-        # Sort by polarity
-        sorted_reviews = sorted(analyzed_reviews, key=lambda x: x['polarity'])
-
-        # Get top negative (lowest polarity)
-        top_negative = sorted_reviews[:top_n]
+        if isinstance(analyzed_reviews, ReviewTable):
+            return analyzed_reviews.top_positive_negative(top_n)
 
-        # Get top positive (highest polarity)
-        top_positive = sorted_reviews[-top_n:][::-1]  # Reverse to get highest first
+        if top_n <= 0:
+            # Degenerate slices: keep what sorted()[-top_n:] has always returned
+            sorted_reviews = sorted(analyzed_reviews, key=lambda x: x['polarity'])
+            return {
+                'top_positive': sorted_reviews[-top_n:][::-1],
+                'top_negative': sorted_reviews[:top_n]
+            }
 
-        return {
-            'top_positive': top_positive,
-            'top_negative': top_negative
-        }
+        # One pass with two bounded heaps instead of sorting every review
+        top, = consume(analyzed_reviews, TopReviews(top_n))
+        return top.result()
 
     def export_results_csv(self, analyzed_reviews, filename='sentiment_results.csv'):
         """
-        Export analyzed reviews to CSV format
+        Export analyzed reviews to CSV format, text cut to 200 characters
+        (exports.iter_csv streams large exports without building one string)
         Returns: CSV content as string
         """
         try:
-            import csv
-            import io
-
-            output = io.StringIO()
-            fieldnames = ['text', 'author', 'rating', 'sentiment', 'polarity', 'subjectivity']
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for review in analyzed_reviews:
-                writer.writerow({
-                    'text': review['text'][:200] + '...' if len(review['text']) > 200 else review['text'],
-                    'author': review['author'],
-                    'rating': review['rating'],
-                    'sentiment': review['sentiment'],
-                    'polarity': review['polarity'],
-                    'subjectivity': review['subjectivity']
-                })
-
-            csv_content = output.getvalue()
-            output.close()
-
+            csv_content = ''.join(iter_csv(analyzed_reviews, truncate=200))
             self.logger.info(f"Exported {len(analyzed_reviews)} reviews to CSV")
             return csv_content
 
@@ -0,0 +1,201 @@
+"""
+Content-addressed cache for sentiment results.
+Entries are keyed by a hash of the normalized review text together with the
+analyzer version and thresholds, so changing either never serves stale
+scores. An in-memory LRU tier sits in front of an optional SQLite tier that
+gunicorn workers on the same host can share.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_LOOKUPS
+
+
+# Two or more newlines end a sentence for TextBlob's tokenizer (pattern's find_tokens)
+PARAGRAPH_BREAK = re.compile(r"\n{2,}")
+
+
+def normalize_text(text):
+    """
+    Collapse whitespace without changing TextBlob's scores: paragraph breaks
+    split sentences, so each run of them is kept as one, and only the
+    whitespace between them is collapsed
+    """
+    parts = PARAGRAPH_BREAK.split(text.replace('\r\n', '\n'))
+    return '\n\n'.join(' '.join(part.split()) or ' ' for part in parts)
+
+
+class SentimentCache:
+    def __init__(self, max_entries=50000, ttl=None, db_path=None, namespace=''):
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.namespace = namespace
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        if self.db_path:
+            self._init_db()
+
+    @classmethod
+    def from_env(cls, namespace=''):
+        ttl = os.environ.get('SENTIMENT_CACHE_TTL')
+        return cls(
+            max_entries=int(os.environ.get('SENTIMENT_CACHE_SIZE', 50000)),
+            ttl=float(ttl) if ttl else None,
+            db_path=os.environ.get('SENTIMENT_CACHE_DB') or None,
+            namespace=namespace
+        )
+
+    def key(self, text):
+        payload = f"{self.namespace}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # --- SQLite tier ---
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sentiment_cache (
+                    key TEXT PRIMARY KEY,
+                    polarity REAL NOT NULL,
+                    subjectivity REAL NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+
+    def _disk_get_many(self, keys):
+        found = {}
+        cutoff = time.time() - self.ttl if self.ttl else 0
+        conn = self._connection()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, polarity, subjectivity, sentiment FROM sentiment_cache "
+                f"WHERE key IN ({placeholders}) AND created_at >= ?",
+                chunk + [cutoff]
+            )
+            for key, polarity, subjectivity, sentiment in rows:
+                found[key] = {'polarity': polarity, 'subjectivity': subjectivity, 'sentiment': sentiment}
+        return found
+
+    def _disk_set_many(self, items):
+        now = time.time()
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache VALUES (?, ?, ?, ?, ?)",
+                [(key, value['polarity'], value['subjectivity'], value['sentiment'], now)
+                 for key, value in items.items()]
+            )
+
+    # --- Public API ---
+
+    def get_many(self, keys):
+        """
+        Look up several keys, memory first and then disk
+        Returns: dict of key -> result for the keys that were found
+        """
+        found = {}
+        missing = []
+        now = time.monotonic()
+
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+                    self._memory.move_to_end(key)
+                    found[key] = dict(entry[1])
+                else:
+                    missing.append(key)
+            self._stats['memory_hits'] += len(found)
+        CACHE_LOOKUPS.inc(len(found), cache='sentiment', result='memory_hit')
+
+        if missing and self.db_path:
+            try:
+                from_disk = self._disk_get_many(missing)
+            except sqlite3.Error as e:
+                self.logger.warning(f"Sentiment cache read failed: {e}")
+                from_disk = {}
+            if from_disk:
+                self._remember(from_disk)
+                found.update(from_disk)
+            with self._lock:
+                self._stats['disk_hits'] += len(from_disk)
+            CACHE_LOOKUPS.inc(len(from_disk), cache='sentiment', result='disk_hit')
+
+        with self._lock:
+            self._stats['misses'] += len(keys) - len(found)
+        CACHE_LOOKUPS.inc(len(keys) - len(found), cache='sentiment', result='miss')
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items):
+        """Store key -> result pairs in every tier"""
+        if not items:
+            return
+        self._remember(items)
+        if self.db_path:
+            try:
+                self._disk_set_many(items)
+            except sqlite3.Error as e:
+                self.logger.warning(f"Sentiment cache write failed: {e}")
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def _remember(self, items):
+        if self.max_entries <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key, value in items.items():
+                self._memory[key] = (now, dict(value))
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        """
+        Hit and miss counters for both tiers
+        Returns: dict of counters plus the overall hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM sentiment_cache")
@@ -1,82 +1,497 @@
+import os
 import time
 import random
 import logging
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_for_futures
+from driver_pool import get_driver_pool
+from retailers import (detect_retailer, canonicalize_url, review_page_url, REVIEW_SELECTORS, REVIEW_FIELDS,
+                       PAGINATED_RETAILERS, HTTP_FIRST_RETAILERS, BLOCKING_PROFILES, is_bot_check)
+from http_session import fetch
+from html_parsing import make_soup
+from rate_limiter import get_rate_limiter
+from scrape_cache import ScrapeCache
+from metrics import STAGE_SECONDS, REVIEWS_SCRAPED, PAGES_FETCHED, CAPTCHA_DETECTIONS
+from profiling import active_session, attached
+
+# Reads review records in the page and returns them as JSON, so the DOM never has
+# to be serialized. Returns null if any field is missing, which sends the page
+# back through the BeautifulSoup parsers.
+EXTRACT_REVIEWS_JS = """
+const [container, fields, limit] = arguments;
+function strippedText(element) {
+    const walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT, {
+        acceptNode: node => ['SCRIPT', 'STYLE'].includes(node.parentNode.nodeName)
+            ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT
+    });
+    const parts = [];
+    while (walker.nextNode()) {
+        const part = walker.currentNode.nodeValue.trim();
+        if (part) parts.push(part);
+    }
+    return parts.join('');
+}
+const records = [];
+for (const node of Array.from(document.querySelectorAll(container)).slice(0, limit)) {
+    const record = {};
+    for (const [name, field] of Object.entries(fields)) {
+        if ('value' in field) { record[name] = field.value; continue; }
+        const element = node.querySelector(field.selector);
+        if (!element) return null;
+        const value = strippedText(element);
+        record[name] = field.first_word ? value.split(' ')[0] : value;
+    }
+    records.push(record);
+}
+return records;
+"""
+
+# Bytes transferred and requests made by the current page, from the Resource Timing API
+PAGE_WEIGHT_JS = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return {bytes: entries.reduce((total, entry) => total + (entry.transferSize || 0), 0), requests: entries.length};
+"""
+
+# Scrolls to the bottom, then resolves with the review count as soon as a DOM
+# mutation adds review nodes, or after quietMs with no new nodes.
+WAIT_FOR_MORE_REVIEWS_JS = """
+const [selector, previous, quietMs, done] = arguments;
+const count = () => document.querySelectorAll(selector).length;
+window.scrollTo(0, document.body.scrollHeight);
+if (count() > previous) { done(count()); return; }
+let timer;
+const observer = new MutationObserver(() => { if (count() > previous) finish(); });
+function finish() { observer.disconnect(); clearTimeout(timer); done(count()); }
+observer.observe(document.body, {childList: true, subtree: true});
+timer = setTimeout(finish, quietMs);
+"""
+
+class ScrapeError(Exception):
+    """A product page could not be read (blocked or failed to load), as opposed to having no reviews"""
+
 
 class SmartScraper:
-    def __init__(self):
+    def __init__(self, driver_pool=None, scrape_cache=None):
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
+        # --- Resource blocking: only the review DOM matters ---
+        self.block_resources = os.environ.get('SCRAPER_BLOCK_RESOURCES', '1') == '1'
+        self._load_stats = {}
+        self._load_lock = threading.Lock()
+
+        # Browsers are long-lived and shared between requests. Selenium is only
+        # imported and the pool only created once a page actually needs a browser.
+        self._driver_pool = driver_pool
+        self._driver_pool_lock = threading.Lock()
+        # Repeat requests for the same product share one scrape
+        self.scrape_cache = scrape_cache or ScrapeCache()
+
+        # --- Pagination limits ---
+        self.page_concurrency = int(os.environ.get('SCRAPER_PAGE_CONCURRENCY', 2))
+        self.max_pages = int(os.environ.get('SCRAPER_MAX_PAGES', 50))
+        self.max_scrolls = int(os.environ.get('SCRAPER_MAX_SCROLLS', 30))
+        self._slots = {}
+        self._slots_lock = threading.Lock()
+
+        # --- Tiered fetching: plain HTTP first, browser only when needed ---
+        self.http_first = os.environ.get('SCRAPER_HTTP_FIRST', '1') == '1'
+        self._tier_counts = {'http': 0, 'browser': 0}
+        self._escalations = {}
+        self._tier_lock = threading.Lock()
+
+        # 'js' reads reviews inside the browser; 'soup' ships page_source to BeautifulSoup
+        self.extraction_mode = os.environ.get('SCRAPER_EXTRACTION', 'js')
+
+        # 'event' waits on DOM mutations after each scroll; 'sleep' is the old fixed delay
+        self.wait_strategy = os.environ.get('SCRAPER_WAIT_STRATEGY', 'event')
+        self.quiet_ms = int(os.environ.get('SCRAPER_QUIET_MS', 1000))
+        self._latencies = {}
+        self._latency_lock = threading.Lock()
+
+    @property
+    def driver_pool(self):
+        if self._driver_pool is None:
+            with self._driver_pool_lock:
+                if self._driver_pool is None:
+                    self._driver_pool = get_driver_pool(self._build_chrome_options)
+        return self._driver_pool
+
+    def _build_chrome_options(self):
+        from selenium.webdriver.chrome.options import Options
+
         # --- Stealth Options to Avoid Detection ---
-        self.chrome_options = Options()
-        self.chrome_options.add_argument("--headless")  # Run in the background
-        self.chrome_options.add_argument("--no-sandbox")
-        self.chrome_options.add_argument("--disable-dev-shm-usage")
-        self.chrome_options.add_argument("--window-size=1920,1080")
-        self.chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-        self.chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        self.chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")  # Run in the background
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+
+        if self.block_resources:
+            # Return from driver.get() at DOMContentLoaded; we wait for the review locator ourselves
+            chrome_options.page_load_strategy = 'eager'
+            chrome_options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.default_content_setting_values.notifications': 2
+            })
+        return chrome_options
 
     def get_reviews(self, url, max_reviews=20):
-        # --- Scraper Logic for All Sites ---
-        driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=self.chrome_options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        """
+        A product's reviews through the scrape cache
+        Returns: list of review dicts, empty if the product has none; raises
+        ScrapeError if its pages could not be read
+        """
+        with STAGE_SECONDS.time(stage='get_reviews'):
+            return list(self.stream_reviews(url, max_reviews))
+
+    def stream_reviews(self, url, max_reviews=20, newest_first=False):
+        """
+        A product's reviews through the scrape cache: cached ones at once,
+        otherwise yielded from iter_reviews as pages load, so callers can
+        analyze them while later pages are still being fetched
+        Returns: generator of review dicts; raises ScrapeError like iter_reviews
+        """
+        key = (canonicalize_url(url), max_reviews, newest_first)
+        return self.scrape_cache.stream(key, detect_retailer(url), lambda: self.iter_reviews(url, max_reviews, newest_first))
+
+    def iter_reviews(self, url, max_reviews=20, newest_first=False):
+        """
+        Yield reviews as pages finish loading, stopping once max_reviews
+        have been produced, the product runs out of review pages or the
+        caller stops iterating (pages still in flight are then cancelled).
+        Raises ScrapeError if the first page cannot be read.
+        """
+        domain = detect_retailer(url)
+        if not domain:
+            self.logger.error("URL does not match any supported retailer.")
+            return
+
+        if domain in PAGINATED_RETAILERS and review_page_url(url, 1):
+            pages = self._iter_review_pages(url, domain, max_reviews, newest_first)
+        else:
+            pages = iter([self._fetch_page(url, domain, max_reviews, scroll_for_more=True)])
+
+        count = 0
+        for reviews in pages:
+            for review in reviews[:max_reviews - count]:
+                yield review
+                count += 1
+            if count >= max_reviews:
+                break
+
+        self.logger.info(f"Successfully scraped {count} reviews.")
+        REVIEWS_SCRAPED.inc(count, retailer=domain)
+        pool_stats = self._driver_pool.stats() if self._driver_pool else None
+        self.logger.info(f"Driver pool: {pool_stats}, fetch tiers: {self.tier_stats()}, page loads: {self.page_load_stats()}, latency: {self.latency_report()}")
+
+    def _iter_review_pages(self, url, domain, max_reviews, newest_first=False):
+        """
+        Fetch numbered review pages concurrently, yielding each page's reviews as it
+        completes; newest_first runs yield pages in page order so reviews stay newest-first
+        """
+        slots = self._domain_slots(domain)
+        executor = ThreadPoolExecutor(max_workers=self.page_concurrency)
+        in_flight = {}
+        finished = {}
+        next_page = 1
+        next_to_yield = 1
+        exhausted = False
+        # Page threads join the request's profile, if it is being profiled
+        session = active_session()
+
+        def load_page(page_url):
+            with attached(session), slots:
+                return self._fetch_page(page_url, domain, max_reviews)
 
-        reviews = []
         try:
-            self.logger.info(f"Navigating to {url} with smart scraper.")
-            driver.get(url)
+            while True:
+                while not exhausted and len(in_flight) < self.page_concurrency and next_page <= self.max_pages:
+                    future = executor.submit(load_page, review_page_url(url, next_page, newest_first))
+                    in_flight[future] = next_page
+                    next_page += 1
+                if not in_flight:
+                    return
+
+                done, _ = wait_for_futures(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = in_flight.pop(future)
+                    try:
+                        reviews = future.result()
+                    except ScrapeError as e:
+                        if page == 1:
+                            raise
+                        # Keep the pages already read; a later page failing ends the run
+                        self.logger.warning(f"Stopping at review page {page}: {e}")
+                        reviews = []
+                    if not reviews:
+                        # An empty page means we have read past the last one
+                        exhausted = True
+                    if not newest_first:
+                        if reviews:
+                            yield reviews
+                        continue
+                    finished[page] = reviews
+                    while next_to_yield in finished:
+                        reviews = finished.pop(next_to_yield)
+                        if not reviews:
+                            return
+                        yield reviews
+                        next_to_yield += 1
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _domain_slots(self, domain):
+        """Per-domain semaphore bounding concurrent page loads across all requests"""
+        with self._slots_lock:
+            if domain not in self._slots:
+                self._slots[domain] = threading.BoundedSemaphore(self.page_concurrency)
+            return self._slots[domain]
+
+    def _fetch_page(self, url, domain, max_reviews, scroll_for_more=False):
+        if self.http_first and domain in HTTP_FIRST_RETAILERS:
+            # Server-rendered reviews are used as they are, even on pages that load more on
+            # scroll; only a bot check, a JS shell or a page without reviews needs the browser
+            reviews, reason = self._fetch_page_http(url, domain, max_reviews)
+            if reviews:
+                self._record_tier('http')
+                return reviews
+            self.logger.info(f"Escalating {url} to the browser ({reason}).")
+            self._record_tier('browser', reason)
+        else:
+            self._record_tier('browser', 'browser_only')
+
+        try:
+            with self.driver_pool.driver() as driver:
+                return self._scrape(driver, url, domain, max_reviews, scroll_for_more)
+        except ScrapeError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Could not scrape {url}: {e}")
+            raise ScrapeError(f"Could not scrape {url}: {e}") from e
 
-            # --- Intelligent Waits for Dynamic Content ---
-            # This waits up to 15 seconds for the review section to appear.
-            # We define different potential locators for each site.
-            locators = {
-                'amazon': (By.CSS_SELECTOR, "div[data-hook='review']"),
-                'flipkart': (By.CSS_SELECTOR, "div._27M-vq"),
-                'myntra': (By.CSS_SELECTOR, "div.user-review-userReviewWrapper"),
-                'jiomart': (By.CSS_SELECTOR, "div.review-card")
+    def _fetch_page_http(self, url, domain, max_reviews):
+        """
+        Try to read a page's reviews with a pooled HTTP request
+        Returns: (reviews, reason) where reason explains an empty result
+        """
+        try:
+            # One retry at most; a persistent block is the browser's job
+            with STAGE_SECONDS.time(stage='http_fetch'):
+                response = fetch(url, retries=1)
+        except Exception as e:
+            self.logger.warning(f"HTTP fetch of {url} failed: {e}")
+            return [], 'http_error'
+        if response.status_code != 200:
+            return [], f'status_{response.status_code}'
+
+        page = response.text
+        if is_bot_check(page, domain):
+            get_rate_limiter().penalize(url)
+            CAPTCHA_DETECTIONS.inc(retailer=domain)
+            return [], 'captcha'
+
+        try:
+            with STAGE_SECONDS.time(stage='parse'):
+                reviews = self._parse(make_soup(page, domain), domain, max_reviews)
+        except Exception:
+            return [], 'parse_error'
+        return reviews, ('no_reviews' if not reviews else None)
+
+    def _record_tier(self, tier, reason=None):
+        PAGES_FETCHED.inc(tier=tier)
+        with self._tier_lock:
+            self._tier_counts[tier] += 1
+            if reason:
+                self._escalations[reason] = self._escalations.get(reason, 0) + 1
+
+    def tier_stats(self):
+        """
+        How often each fetch tier served a page
+        Returns: dict with per-tier counts and escalation reasons
+        """
+        with self._tier_lock:
+            total = sum(self._tier_counts.values())
+            return {
+                'http': self._tier_counts['http'],
+                'browser': self._tier_counts['browser'],
+                'browser_ratio': round(self._tier_counts['browser'] / total, 3) if total else 0.0,
+                'escalations': dict(self._escalations)
             }
-            
-            domain = next((d for d in locators if d in url), None)
-            if not domain:
-                self.logger.error("URL does not match any supported retailer.")
+
+    def _scrape(self, driver, url, domain, max_reviews, scroll_for_more=False):
+        self.logger.info(f"Navigating to {url} with smart scraper.")
+        self._apply_blocking(driver, domain)
+        get_rate_limiter().acquire(url)
+        started = time.monotonic()
+        with STAGE_SECONDS.time(stage='navigation'):
+            driver.get(url)
+
+        # --- Intelligent Waits for Dynamic Content ---
+        # This waits up to 15 seconds for the review section to appear.
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
+        locator = (By.CSS_SELECTOR, REVIEW_SELECTORS[domain])
+        wait = WebDriverWait(driver, 15)
+        with STAGE_SECONDS.time(stage='wait_for_reviews'):
+            try:
+                wait.until(EC.presence_of_element_located(locator))
+            except TimeoutException:
+                # Either the page has no reviews or a bot check took its place
+                if is_bot_check(driver.page_source, domain):
+                    get_rate_limiter().penalize(url)
+                    CAPTCHA_DETECTIONS.inc(retailer=domain)
+                    raise ScrapeError(f"Bot check instead of {url}")
+                self.logger.info(f"No reviews on {url}.")
                 return []
+        self._record_page_load(driver, url, time.monotonic() - started)
+
+        with STAGE_SECONDS.time(stage='scroll'):
+            if scroll_for_more and self.wait_strategy == 'event':
+                # Infinite-scroll pages: scroll until enough reviews exist or scrolling stops adding any
+                self._scroll_until_loaded(driver, REVIEW_SELECTORS[domain], max_reviews)
+            elif scroll_for_more:
+                # Infinite-scroll pages: keep scrolling until enough reviews are loaded
+                self._scroll_for_reviews(driver, locator, max_reviews)
+            elif self.wait_strategy == 'event':
+                # Numbered review pages never load more on scroll, and the reviews are already present
+                pass
+            else:
+                # Scroll to ensure all content is loaded
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.7);")
+                time.sleep(random.uniform(2, 4)) # Allow time for scroll-triggered content
+
+        reviews = None
+        if self.extraction_mode == 'js':
+            with STAGE_SECONDS.time(stage='extract_in_browser'):
+                reviews = self._extract_in_browser(driver, domain, max_reviews)
+        if reviews is None:
+            with STAGE_SECONDS.time(stage='parse'):
+                soup = make_soup(driver.page_source, domain)
+                reviews = self._parse(soup, domain, max_reviews)
+
+        self._record_latency(time.monotonic() - started)
+        self.logger.info(f"Scraped {len(reviews)} reviews from {url}.")
+        return reviews
 
-            wait = WebDriverWait(driver, 15)
-            wait.until(EC.presence_of_element_located(locators[domain]))
-            
-            # Scroll to ensure all content is loaded
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.7);")
-            time.sleep(random.uniform(2, 4)) # Allow time for scroll-triggered content
-
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # --- Call the correct parsing function based on domain ---
-            if domain == 'amazon':
-                reviews = self._parse_amazon(soup, max_reviews)
-            elif domain == 'flipkart':
-                reviews = self._parse_flipkart(soup, max_reviews)
-            elif domain == 'myntra':
-                reviews = self._parse_myntra(soup, max_reviews)
-            elif domain == 'jiomart':
-                reviews = self._parse_jiomart(soup, max_reviews)
-            
-            self.logger.info(f"Successfully scraped {len(reviews)} reviews.")
-            return reviews
-            
+    def _record_latency(self, seconds):
+        with self._latency_lock:
+            samples = self._latencies.setdefault(self.wait_strategy, deque(maxlen=1000))
+            samples.append(seconds)
+
+    def latency_report(self):
+        """
+        p50/p95 page scrape latency for each wait strategy that has run
+        Returns: dict of strategy -> {'pages', 'p50', 'p95'} in seconds
+        """
+        report = {}
+        with self._latency_lock:
+            for strategy, samples in self._latencies.items():
+                ordered = sorted(samples)
+                report[strategy] = {
+                    'pages': len(ordered),
+                    'p50': round(ordered[int(0.50 * (len(ordered) - 1))], 3),
+                    'p95': round(ordered[int(0.95 * (len(ordered) - 1))], 3)
+                }
+        return report
+
+    def _apply_blocking(self, driver, domain):
+        """Set the retailer's blocklist on the (possibly reused) driver via CDP"""
+        patterns = BLOCKING_PROFILES.get(domain, []) if self.block_resources else []
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
         except Exception as e:
-            self.logger.error(f"A critical error occurred: {e}")
-            return []
-        finally:
-            driver.quit()
+            self.logger.warning(f"Could not apply resource blocking: {e}")
+
+    def _record_page_load(self, driver, url, seconds):
+        try:
+            weight = driver.execute_script(PAGE_WEIGHT_JS)
+        except Exception:
+            weight = {'bytes': 0, 'requests': 0}
+        mode = 'blocked' if self.block_resources else 'unblocked'
+        self.logger.info(f"Loaded {url} in {seconds:.2f}s: {weight['bytes'] / 1024:.0f} KB over {weight['requests']} requests ({mode}).")
+
+        with self._load_lock:
+            stats = self._load_stats.setdefault(mode, {'pages': 0, 'bytes': 0, 'seconds': 0.0})
+            stats['pages'] += 1
+            stats['bytes'] += weight['bytes']
+            stats['seconds'] += seconds
+
+    def page_load_stats(self):
+        """
+        Average page weight and load time, split by whether blocking was on
+        Returns: dict of mode -> averages
+        """
+        with self._load_lock:
+            return {
+                mode: {
+                    'pages': stats['pages'],
+                    'avg_kb': round(stats['bytes'] / stats['pages'] / 1024, 1),
+                    'avg_seconds': round(stats['seconds'] / stats['pages'], 3)
+                }
+                for mode, stats in self._load_stats.items()
+            }
+
+    def _extract_in_browser(self, driver, domain, max_reviews):
+        """
+        Extract review records with a single execute_script call
+        Returns: list of reviews, or None to fall back to BeautifulSoup
+        """
+        try:
+            records = driver.execute_script(EXTRACT_REVIEWS_JS, REVIEW_SELECTORS[domain], REVIEW_FIELDS[domain], max_reviews)
+        except Exception as e:
+            self.logger.warning(f"In-browser extraction failed, parsing page source instead: {e}")
+            return None
+        if records is None:
+            return None
+        return [{'text': r['text'], 'author': r['author'], 'rating': r['rating']} for r in records]
+
+    def _parse(self, soup, domain, max_reviews):
+        # --- Call the correct parsing function based on domain ---
+        if domain == 'amazon':
+            return self._parse_amazon(soup, max_reviews)
+        elif domain == 'flipkart':
+            return self._parse_flipkart(soup, max_reviews)
+        elif domain == 'myntra':
+            return self._parse_myntra(soup, max_reviews)
+        elif domain == 'jiomart':
+            return self._parse_jiomart(soup, max_reviews)
+        return []
+
+    def _scroll_until_loaded(self, driver, selector, max_reviews):
+        """Scroll until max_reviews nodes exist or a scroll adds none within the quiet window"""
+        driver.set_script_timeout(self.quiet_ms / 1000 + 5)
+        count = driver.execute_script("return document.querySelectorAll(arguments[0]).length;", selector)
+        for _ in range(self.max_scrolls):
+            if count >= max_reviews:
+                break
+            new_count = driver.execute_async_script(WAIT_FOR_MORE_REVIEWS_JS, selector, count, self.quiet_ms)
+            if new_count <= count:
+                break
+            count = new_count
+
+    def _scroll_for_reviews(self, driver, locator, max_reviews):
+        """Scroll to the bottom until max_reviews nodes exist or no new ones appear"""
+        count = len(driver.find_elements(*locator))
+        for _ in range(self.max_scrolls):
+            if count >= max_reviews:
+                break
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(random.uniform(1.5, 2.5)) # Allow time for the next batch to load
+            new_count = len(driver.find_elements(*locator))
+            if new_count == count:
+                break
+            count = new_count
 
     def _parse_amazon(self, soup, max_reviews):
         reviews = []
@@ -20,6 +20,9 @@ function initializeApp() {
 
     // Setup copy functionality
     setupCopyToClipboard();
+
+    // Resume polling when landing on a pending job page
+    setupJobStatusPage();
 }
 
 function setupFormValidation() {
@@ -29,12 +32,12 @@ function setupFormValidation() {
 
     if (!form || !urlInput || !submitBtn) return;
 
-    // Allowed domains for validation
+    // Supported retailers (matched against the hostname, like the server does)
     const allowedDomains = [
-        'quotes.toscrape.com',
-        'books.toscrape.com',
-        'scrapethissite.com',
-        'httpbin.org'
+        'amazon',
+        'flipkart',
+        'jiomart',
+        'myntra'
     ];
 
     // Real-time URL validation
@@ -44,9 +47,10 @@ function setupFormValidation() {
 
     // Form submission handling
     form.addEventListener('submit', function(e) {
+        e.preventDefault();
+
         if (!validateUrl(urlInput.value)) {
-            e.preventDefault();
-            showError('Please enter a valid URL from one of our supported demo sites.');
+            showError('Please enter a product URL from one of the supported retailers.');
             return;
         }
 
@@ -54,8 +58,32 @@ function setupFormValidation() {
         showLoadingModal();
 
         // Disable submit button to prevent double submission
+        const originalLabel = submitBtn.innerHTML;
         submitBtn.disabled = true;
         submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Processing...';
+
+        function resetForm(message) {
+            hideLoadingModal();
+            submitBtn.disabled = false;
+            submitBtn.innerHTML = originalLabel;
+            showError(message);
+        }
+
+        // Queue the analysis and poll until the results are ready
+        fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(response => response.json().then(data => ({ ok: response.ok, data })))
+            .then(({ ok, data }) => {
+                if (!ok) {
+                    resetForm(data.error || 'Could not start the analysis.');
+                    return;
+                }
+                pollJob(data.status_url, data.results_url, null, resetForm);
+            })
+            .catch(() => resetForm('Could not reach the server. Please try again.'));
     });
 
     function validateUrl(url) {
@@ -70,7 +98,7 @@ function setupFormValidation() {
                 domain = domain.substring(4);
             }
 
-            const isValid = allowedDomains.includes(domain);
+            const isValid = allowedDomains.some(name => domain.includes(name));
 
             // Update UI based on validation
             if (url && !isValid) {
@@ -92,6 +120,45 @@ function setupFormValidation() {
     }
 }
 
+function pollJob(statusUrl, resultsUrl, onStatus, onError) {
+    const interval = 2000;
+
+    function check() {
+        fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.json().then(data => ({ ok: response.ok, data })))
+            .then(({ ok, data }) => {
+                if (!ok) {
+                    onError(data.error || 'The analysis could not be found.');
+                    return;
+                }
+                if (onStatus) onStatus(data.status);
+
+                if (data.status === 'done' || data.status === 'failed') {
+                    // The results page renders the outcome, including errors
+                    window.location = resultsUrl;
+                } else {
+                    setTimeout(check, interval);
+                }
+            })
+            .catch(() => setTimeout(check, interval));
+    }
+
+    check();
+}
+
+function setupJobStatusPage() {
+    const jobStatus = document.getElementById('jobStatus');
+    if (!jobStatus) return;
+
+    const statusText = document.getElementById('jobStatusText');
+    pollJob(
+        jobStatus.dataset.statusUrl,
+        jobStatus.dataset.resultsUrl,
+        status => { if (statusText) statusText.textContent = status; },
+        showError
+    );
+}
+
 function setupLoadingModal() {
     const loadingModal = document.getElementById('loadingModal');
     if (!loadingModal) return;
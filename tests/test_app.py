@@ -0,0 +1,118 @@
+import os
+import time
+
+import pytest
+
+# Importing the app checks for chromedriver; nothing here starts a browser
+os.environ.setdefault('CHROMEDRIVER_PATH', '/bin/true')
+os.environ['REVIEW_STORE_DB'] = ''
+os.environ['JOB_STATE_DB'] = ''
+
+import app as web
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(web, 'BATCH_OUTPUT_DIR', str(tmp_path))
+    return web.app.test_client()
+
+
+def wait_for(client, status_url):
+    status = client.get(status_url).json
+    while status['status'] in ('pending', 'running'):
+        time.sleep(0.005)
+        status = client.get(status_url).json
+    return status
+
+
+class FakeBatchRunner:
+    def run(self, urls, output_path, profile=False):
+        open(output_path, 'w').close()
+        return {'skipped': 0, 'ok': len(urls)}
+
+
+def test_batch_job_results_show_the_batch_summary(client, monkeypatch):
+    monkeypatch.setitem(web._services, 'batch_runner', FakeBatchRunner())
+    started = client.post('/batch', json={'urls': ['https://www.amazon.in/dp/B0ABCDEF12']}).json
+    assert wait_for(client, started['status_url'])['status'] == 'done'
+
+    response = client.get(f"/jobs/{started['job_id']}/results")
+    assert response.status_code == 200
+    assert response.json['summary'] == {'skipped': 0, 'ok': 1}
+    assert response.json['results_url'] == started['results_url']
+
+
+@pytest.mark.parametrize('body', [['https://www.amazon.in/dp/B0ABCDEF12'], {'urls': 'https://www.amazon.in/dp/B0ABCDEF12'}])
+def test_malformed_batch_bodies_are_rejected(client, body):
+    assert client.post('/batch', json=body).status_code == 400
+
+
+@pytest.mark.parametrize('query', ['Positive=²', 'Positive=' + '9' * 5000, 'Positive=1000000000', 'Happy=3'])
+def test_bad_chart_counts_are_rejected(client, query):
+    assert client.get(f'/charts/sentiment.svg?{query}').status_code == 400
+
+
+def test_chart_renders_valid_counts(client):
+    assert client.get('/charts/sentiment.svg?Positive=12&Negative=3&Neutral=999999999').status_code == 200
+
+
+@pytest.fixture
+def stored_product(tmp_path, monkeypatch):
+    from review_store import ReviewStore
+
+    store = ReviewStore(str(tmp_path / 'reviews.sqlite3'))
+    monkeypatch.setitem(web._services, 'review_store', store)
+    product = store.ensure_product('https://www.amazon.in/dp/B0ABCDEF12')
+    store.add_reviews(product['id'], ['digest'], [{'text': 'Great', 'author': 'A', 'rating': '5',
+                                                   'polarity': 0.8, 'subjectivity': 0.75, 'sentiment': 'Positive'}])
+    return product
+
+
+@pytest.mark.parametrize('bound', ['min_rating=²', 'max_rating=' + '9' * 5000, 'min_rating=1000', 'max_rating=-1'])
+def test_bad_rating_bounds_are_rejected(client, stored_product, bound):
+    response = client.get(f'/exports/reviews.jsonl?url={stored_product["canonical_url"]}&{bound}')
+    assert response.status_code == 400
+
+
+def test_export_applies_rating_bounds(client, stored_product):
+    url = stored_product['canonical_url']
+    assert b'Great' in client.get(f'/exports/reviews.jsonl?url={url}&min_rating=4').data
+    assert client.get(f'/exports/reviews.jsonl?url={url}&max_rating=4').data == b''
+
+
+class PagedScraper:
+    """Two pages of reviews; notes how many reviews were scored before the second page loaded"""
+
+    def __init__(self, scored):
+        self.scored = scored
+        self.scored_before_second_page = None
+
+    def stream_reviews(self, url, max_reviews=20, newest_first=False):
+        for page in range(2):
+            if page:
+                self.scored_before_second_page = len(self.scored)
+            for i in range(web.REVIEWS_PER_PAGE):
+                yield {'text': f'Great product, review {page}-{i}', 'author': 'Customer', 'rating': '5'}
+
+
+def test_analysis_scores_pages_while_scraping(monkeypatch):
+    from sentiment import SentimentAnalyzer
+
+    analyzer = SentimentAnalyzer()
+    scored = []
+    analyze_batch = analyzer.analyze_batch
+
+    def counting_batch(texts):
+        texts = list(texts)
+        scored.extend(texts)
+        return analyze_batch(texts)
+
+    monkeypatch.setattr(analyzer, 'analyze_batch', counting_batch)
+    scraper = PagedScraper(scored)
+    monkeypatch.setitem(web._services, 'scraper', scraper)
+    monkeypatch.setitem(web._services, 'analyzer', analyzer)
+
+    result = web.run_analysis('https://www.amazon.in/dp/B0ABCDEF12')
+    assert scraper.scored_before_second_page == web.REVIEWS_PER_PAGE
+    assert result['total_reviews'] == 2 * web.REVIEWS_PER_PAGE
+    assert result['sentiment_counts']['Positive'] == 2 * web.REVIEWS_PER_PAGE
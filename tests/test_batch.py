@@ -0,0 +1,54 @@
+import json
+
+from batch import BatchRunner, load_completed
+from results_table import ReviewTable
+from smart_scraper import ScrapeError
+
+BLOCKED_URL = 'https://www.amazon.in/dp/B0BLOCKED1'
+EMPTY_URL = 'https://www.amazon.in/dp/B0NOREVIEW'
+GOOD_URL = 'https://www.amazon.in/dp/B0GOODGOOD'
+
+
+class FakeScraper:
+    def __init__(self):
+        self.blocked = True
+
+    def stream_reviews(self, url, max_reviews=20, newest_first=False):
+        if url == BLOCKED_URL and self.blocked:
+            raise ScrapeError(f'Bot check instead of {url}')
+        if url != EMPTY_URL:
+            yield {'text': 'Works well', 'author': 'Customer', 'rating': '5'}
+
+
+class FakeAnalyzer:
+    def analyze_reviews_table(self, reviews, chunk_size=None):
+        return ReviewTable.from_reviews(self.iter_analyze(reviews))
+
+    def iter_analyze(self, reviews, chunk_size=None):
+        for review in reviews:
+            yield dict(review, polarity=0.5, subjectivity=0.5, sentiment='Positive')
+
+    def get_sentiment_statistics(self, table):
+        return table.statistics()
+
+
+def read_records(path):
+    with open(path) as f:
+        return {record['url']: record for record in map(json.loads, f)}
+
+
+def test_failed_scrapes_are_errors_and_retried_on_resume(tmp_path):
+    output = str(tmp_path / 'results.jsonl')
+    scraper = FakeScraper()
+    runner = BatchRunner(scraper=scraper, analyzer=FakeAnalyzer(), workers=2)
+
+    summary = runner.run([BLOCKED_URL, EMPTY_URL, GOOD_URL], output)
+    assert summary == {'skipped': 0, 'error': 1, 'no_reviews': 1, 'ok': 1}
+    records = read_records(output)
+    assert records[BLOCKED_URL]['status'] == 'error'
+    assert records[EMPTY_URL]['status'] == 'no_reviews'
+    assert BLOCKED_URL not in load_completed(output)
+
+    scraper.blocked = False
+    summary = runner.run([BLOCKED_URL, EMPTY_URL, GOOD_URL], output)
+    assert summary == {'skipped': 2, 'ok': 1}
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from http_session import retry_after_seconds, backoff_delay, BACKOFF_MAX
+
+
+class Response:
+    def __init__(self, retry_after):
+        self.headers = {'Retry-After': retry_after}
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds('5') == 5.0
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 < retry_after_seconds(format_datetime(when, usegmt=True)) <= 30
+    assert retry_after_seconds('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+@pytest.mark.parametrize('value', ['²', '-3', '9' * 5000, 'soon', ''])
+def test_unreadable_retry_after_falls_back_to_backoff(value):
+    assert retry_after_seconds(value) is None
+    assert 0 <= backoff_delay(0, Response(value)) <= BACKOFF_MAX
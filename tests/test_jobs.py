@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from jobs import Job, JobQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite3')
+
+
+def test_other_processes_see_running_jobs(db_path):
+    owner = JobQueue(workers=1, db_path=db_path, lease=60)
+    reader = JobQueue(workers=1, db_path=db_path, lease=60)
+    release = threading.Event()
+    job = owner.submit(release.wait, 5)
+
+    assert reader.get(job.id).status in (Job.PENDING, Job.RUNNING)
+    release.set()
+    owner._queue.join()
+    assert reader.get(job.id).status == Job.DONE
+
+
+def test_job_of_a_dead_process_is_failed_when_read(db_path):
+    dead = JobQueue(workers=1, db_path=db_path, lease=60)
+    job = Job(None, (), {})
+    job.status = Job.RUNNING
+    dead._save(job)
+    with dead._connection() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = heartbeat_at - 120 WHERE id = ?", (job.id,))
+
+    reader = JobQueue(workers=1, db_path=db_path, lease=60)
+    failed = reader.get(job.id)
+    assert failed.status == Job.FAILED
+    assert failed.finished_at is not None
+    assert JobQueue(workers=1, db_path=db_path, lease=60).get(job.id).status == Job.FAILED
+
+
+def test_heartbeat_keeps_long_jobs_alive(db_path):
+    owner = JobQueue(workers=1, db_path=db_path, lease=0.2)
+    reader = JobQueue(workers=1, db_path=db_path, lease=0.2)
+    release = threading.Event()
+    job = owner.submit(release.wait, 5)
+
+    # Several leases go by while the job runs
+    threading.Event().wait(0.6)
+    assert reader.get(job.id).status == Job.RUNNING
+    release.set()
+    owner._queue.join()
+    assert reader.get(job.id).status == Job.DONE
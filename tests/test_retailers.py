@@ -0,0 +1,45 @@
+import pytest
+
+from retailers import canonicalize_url, review_page_url, is_bot_check
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.amazon.in/Some-Phone/dp/B0ABCDEF12/ref=sr_1_1?keywords=phone&qid=1',
+    'https://amazon.in/gp/product/b0abcdef12?psc=1',
+    'https://www.amazon.in/product-reviews/B0ABCDEF12/?pageNumber=2',
+])
+def test_amazon_urls_reduce_to_the_asin(url):
+    assert canonicalize_url(url) == 'https://www.amazon.in/dp/B0ABCDEF12'
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.flipkart.com/some-phone/p/ITMABC123?pid=MOBXYZ&lid=L1&otracker=search',
+    'https://dl.flipkart.com/other-slug/product-reviews/itmabc123?pid=MOBXYZ&page=2',
+])
+def test_flipkart_urls_reduce_to_item_and_pid(url):
+    assert canonicalize_url(url) == 'https://www.flipkart.com/p/itmabc123?pid=MOBXYZ'
+
+
+def test_tracking_parameters_are_dropped():
+    url = 'https://www.myntra.com/tshirts/brand/name/123456/buy?utm_source=mail&fbclid=x'
+    assert canonicalize_url(url) == 'https://www.myntra.com/tshirts/brand/name/123456/buy'
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.amazon.in/Some-Phone/dp/B0ABCDEF12/ref=sr_1_1',
+    'https://www.flipkart.com/some-phone/p/itmabc123?pid=MOBXYZ',
+    'https://www.jiomart.com/p/groceries/x/590001?src=app',
+])
+def test_canonicalization_is_idempotent(url):
+    canonical = canonicalize_url(url)
+    assert canonicalize_url(canonical) == canonical
+
+
+def test_canonical_flipkart_url_still_has_review_pages():
+    assert review_page_url(canonicalize_url('https://www.flipkart.com/some-phone/p/itmabc123?pid=MOBXYZ'), 1) is not None
+    assert review_page_url('https://www.myntra.com/tshirts/brand/name/123456/buy', 1) is None
+
+
+def test_bot_check_ignores_captcha_in_ordinary_pages():
+    assert not is_bot_check('<script src="https://www.google.com/recaptcha/api.js"></script>', 'amazon')
+    assert is_bot_check('<form method="get" action="/errors/validateCaptcha">', 'amazon')
@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+
+from results_table import ReviewTable
+from review_store import ReviewStore, update_product
+
+PAGINATED_URL = 'https://www.amazon.in/Some-Phone/dp/B0ABCDEF12/ref=sr_1_1'
+SCROLLING_URL = 'https://www.myntra.com/tshirts/brand/name/123456/buy'
+
+
+def review(i):
+    return {'text': f'Review number {i}', 'author': f'Customer {i}', 'rating': '4'}
+
+
+class FakeScraper:
+    """Yields the given reviews newest-first and records how far it was read"""
+
+    def __init__(self, reviews, gate=None):
+        self.reviews = reviews
+        self.gate = gate
+        self.calls = 0
+        self.yielded = 0
+        self.closed = False
+
+    def stream_reviews(self, url, max_reviews=20, newest_first=False):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        try:
+            for item in self.reviews[:max_reviews]:
+                self.yielded += 1
+                yield item
+        finally:
+            self.closed = True
+
+
+class FakeAnalyzer:
+    def analyze_reviews_table(self, reviews, chunk_size=None):
+        return ReviewTable.from_reviews(self.iter_analyze(reviews))
+
+    def iter_analyze(self, reviews):
+        for item in reviews:
+            yield dict(item, polarity=0.5, subjectivity=0.5, sentiment='Positive')
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReviewStore(str(tmp_path / 'reviews.sqlite3'))
+
+
+def test_rescraped_reviews_are_not_duplicated(store):
+    scraper = FakeScraper([review(2), review(1)])
+    _, added = update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL)
+    assert added == 2
+
+    # Same product under another URL, and the same review with different whitespace
+    scraper = FakeScraper([dict(review(2), text='  Review   number 2 '), review(1)])
+    _, added = update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL + '?th=1', refresh_after=0)
+    product = store.get_product(PAGINATED_URL)
+    assert added == 0
+    assert store.review_count(product['id']) == 2
+
+
+def test_paginated_update_stops_at_first_known_review(store):
+    update_product(store, FakeScraper([review(2), review(1)]), FakeAnalyzer(), PAGINATED_URL)
+
+    scraper = FakeScraper([review(4), review(3), review(2), review(1)])
+    product, added = update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL, refresh_after=0)
+    assert added == 2
+    assert scraper.yielded == 3
+    assert scraper.closed
+    assert [item['text'] for item in store.iter_reviews(product['id'])] == \
+        ['Review number 2', 'Review number 1', 'Review number 4', 'Review number 3']
+
+
+def test_scrolling_update_reads_past_known_reviews(store):
+    update_product(store, FakeScraper([review(1)]), FakeAnalyzer(), SCROLLING_URL)
+
+    # No date order on a scrolling page, so a new review may follow a known one
+    scraper = FakeScraper([review(1), review(2)])
+    _, added = update_product(store, scraper, FakeAnalyzer(), SCROLLING_URL, refresh_after=0)
+    assert added == 1
+    assert scraper.yielded == 2
+
+
+def test_recently_scraped_product_is_not_scraped_again(store):
+    update_product(store, FakeScraper([review(1)]), FakeAnalyzer(), PAGINATED_URL)
+
+    scraper = FakeScraper([review(2)])
+    _, added = update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL, refresh_after=3600)
+    assert added == 0
+    assert scraper.calls == 0
+
+
+def test_empty_first_scrape_leaves_product_due(store):
+    product, added = update_product(store, FakeScraper([]), FakeAnalyzer(), PAGINATED_URL)
+    assert added == 0
+    assert product['last_scraped'] is None
+
+    scraper = FakeScraper([review(1)])
+    _, added = update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL, refresh_after=3600)
+    assert scraper.calls == 1
+    assert added == 1
+
+
+def test_concurrent_updates_share_one_scrape(store):
+    gate = threading.Event()
+    scraper = FakeScraper([review(1), review(2)], gate=gate)
+    results = []
+
+    def update():
+        results.append(update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL))
+
+    threads = [threading.Thread(target=update) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while not store._updates:
+        pass
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert scraper.calls == 1
+    assert sorted(added for _, added in results) == [0, 0, 0, 2]
+    assert all(product['last_scraped'] for product, _ in results)
+
+
+def test_updates_go_through_the_scrape_cache(store, monkeypatch):
+    from smart_scraper import SmartScraper
+    from scrape_cache import ScrapeCache
+
+    scraper = SmartScraper(scrape_cache=ScrapeCache(ttls={'amazon': 3600}, max_entries=10))
+    loads = []
+
+    def fetch_page(url, domain, max_reviews, scroll_for_more=False):
+        loads.append(url)
+        return [review(2), review(1)] if 'pageNumber=1' in url else []
+
+    monkeypatch.setattr(scraper, '_fetch_page', fetch_page)
+    update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL)
+    pages_loaded = len(loads)
+
+    # Past the store's refresh interval but inside the cache TTL: no pages are loaded again
+    _, added = update_product(store, scraper, FakeAnalyzer(), PAGINATED_URL, refresh_after=0)
+    assert added == 0
+    assert len(loads) == pages_loaded
+    assert scraper.scrape_cache.stats()['hits'] == 1
@@ -0,0 +1,128 @@
+import time
+import threading
+
+import pytest
+
+from scrape_cache import ScrapeCache
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = ScrapeCache(max_entries=10)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return [{'text': 'good'}]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch('key', 'amazon', fetch)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()['misses'] + cache.stats()['coalesced'] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[{'text': 'good'}]] * 5
+    assert cache.stats()['coalesced'] == 4
+
+
+def test_stale_entry_is_served_while_refreshing():
+    cache = ScrapeCache(ttls={'amazon': 60}, stale_window=60, max_entries=10)
+    cache.get_or_fetch('key', 'amazon', lambda: ['old'])
+    stored_at, result = cache._entries['key']
+    cache._entries['key'] = (stored_at - 90, result)
+
+    refreshed = threading.Event()
+
+    def refresh():
+        refreshed.set()
+        return ['new']
+
+    assert cache.get_or_fetch('key', 'amazon', refresh) == ['old']
+    assert refreshed.wait(5)
+    deadline = time.time() + 5
+    while cache._entries['key'][1] != ['new'] and time.time() < deadline:
+        time.sleep(0.001)
+    assert cache.get_or_fetch('key', 'amazon', lambda: pytest.fail('fresh entry refetched')) == ['new']
+
+
+def test_entry_past_the_stale_window_is_refetched():
+    cache = ScrapeCache(ttls={'amazon': 60}, stale_window=60, max_entries=10)
+    cache.get_or_fetch('key', 'amazon', lambda: ['old'])
+    stored_at, result = cache._entries['key']
+    cache._entries['key'] = (stored_at - 200, result)
+
+    assert cache.get_or_fetch('key', 'amazon', lambda: ['new']) == ['new']
+
+
+def test_empty_results_are_not_cached():
+    cache = ScrapeCache(max_entries=10)
+    assert cache.get_or_fetch('key', 'amazon', lambda: []) == []
+    assert cache.get_or_fetch('key', 'amazon', lambda: ['found']) == ['found']
+
+
+def test_fetch_errors_are_raised_and_not_cached():
+    cache = ScrapeCache(max_entries=10)
+
+    def fetch():
+        raise RuntimeError('blocked')
+
+    with pytest.raises(RuntimeError, match='blocked'):
+        cache.get_or_fetch('key', 'amazon', fetch)
+    assert cache.stats()['entries'] == 0
+
+
+def test_stream_yields_while_fetching_and_caches_complete_runs():
+    cache = ScrapeCache(max_entries=10)
+    produced = []
+
+    def iterate():
+        for item in ('a', 'b', 'c'):
+            produced.append(item)
+            yield item
+
+    stream = cache.stream('key', 'amazon', iterate)
+    assert next(stream) == 'a'
+    assert produced == ['a']
+    assert list(stream) == ['b', 'c']
+    assert list(cache.stream('key', 'amazon', lambda: pytest.fail('cached run refetched'))) == ['a', 'b', 'c']
+
+
+def test_stream_stopped_early_is_not_cached():
+    cache = ScrapeCache(max_entries=10)
+    stream = cache.stream('key', 'amazon', lambda: iter(['a', 'b', 'c']))
+    assert next(stream) == 'a'
+    stream.close()
+    assert cache.stats()['entries'] == 0
+    assert list(cache.stream('key', 'amazon', lambda: iter(['x']))) == ['x']
+
+
+def test_stream_followers_share_the_leaders_run():
+    cache = ScrapeCache(max_entries=10)
+    release = threading.Event()
+    calls = []
+
+    def iterate():
+        calls.append(1)
+        yield 'a'
+        release.wait(5)
+        yield 'b'
+
+    leader = cache.stream('key', 'amazon', iterate)
+    assert next(leader) == 'a'
+    followers = []
+    thread = threading.Thread(target=lambda: followers.append(list(cache.stream('key', 'amazon', iterate))))
+    thread.start()
+    while cache.stats()['coalesced'] < 1:
+        time.sleep(0.001)
+    release.set()
+    assert list(leader) == ['b']
+    thread.join()
+    assert followers == [['a', 'b']]
+    assert len(calls) == 1
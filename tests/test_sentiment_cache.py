@@ -0,0 +1,28 @@
+import pytest
+
+from sentiment_cache import normalize_text, SentimentCache
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('good  \t product\n', 'good product'),
+    ('great :\n\n) phone', 'great :\n\n) phone'),
+    ('a\r\n\r\n\r\nb', 'a\n\nb'),
+    ('a\n\n \n\nb', 'a\n\n \n\nb'),
+])
+def test_normalize_keeps_paragraph_breaks(text, expected):
+    assert normalize_text(text) == expected
+    assert normalize_text(expected) == expected
+
+
+def test_paragraph_break_changes_the_cache_key():
+    cache = SentimentCache()
+    assert cache.key('nice :\n\n) case') != cache.key('nice : ) case')
+    assert cache.key('nice  : ) case ') == cache.key('nice : ) case')
+
+
+def test_normalized_text_scores_the_same():
+    from textblob.en.sentiments import PatternAnalyzer
+
+    analyzer = PatternAnalyzer()
+    for text in ('so good :\n\n) really', 'bad ;\n\n( day\n\n\n', 'not\n\n \n\ngreat', 'fine\r\n\r\n:-)'):
+        assert analyzer.analyze(normalize_text(text))[:2] == analyzer.analyze(text)[:2]
@@ -0,0 +1,44 @@
+import pytest
+
+from smart_scraper import SmartScraper, ScrapeError
+from scrape_cache import ScrapeCache
+
+PAGINATED_URL = 'https://www.amazon.in/dp/B0ABCDEF12'
+
+
+def review(i):
+    return {'text': f'Review number {i}', 'author': f'Customer {i}', 'rating': '4'}
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    scraper = SmartScraper(scrape_cache=ScrapeCache(max_entries=10))
+    scraper.page_concurrency = 1
+    return scraper
+
+
+def serve_pages(monkeypatch, scraper, pages):
+    """Replace page loads with pages[n - 1] for page n: a list of reviews or an exception"""
+    def fetch_page(url, domain, max_reviews, scroll_for_more=False):
+        number = int(url.split('pageNumber=')[1].split('&')[0])
+        page = pages[number - 1] if number <= len(pages) else []
+        if isinstance(page, Exception):
+            raise page
+        return page
+    monkeypatch.setattr(scraper, '_fetch_page', fetch_page)
+
+
+def test_unreadable_first_page_raises(monkeypatch, scraper):
+    serve_pages(monkeypatch, scraper, [ScrapeError('Bot check')])
+    with pytest.raises(ScrapeError):
+        scraper.get_reviews(PAGINATED_URL, max_reviews=20)
+
+
+def test_product_without_reviews_is_empty(monkeypatch, scraper):
+    serve_pages(monkeypatch, scraper, [])
+    assert scraper.get_reviews(PAGINATED_URL, max_reviews=20) == []
+
+
+def test_unreadable_later_page_keeps_earlier_pages(monkeypatch, scraper):
+    serve_pages(monkeypatch, scraper, [[review(1), review(2)], ScrapeError('Bot check')])
+    assert scraper.get_reviews(PAGINATED_URL, max_reviews=20) == [review(1), review(2)]